@@ -1,13 +1,9 @@
 #!/usr/bin/env python3
 """
 Flask应用启动脚本
-"""
-
-import os
-import sys
 
-# 添加项目路径
-sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+需先以 `pip install -e .` 安装本包，也可直接使用 `ai-movie-web` 命令。
+"""
 
 from ai_movie.web import create_app
 
@@ -9,10 +9,22 @@ __author__ = "AI Movie Team"
 __email__ = "contact@ai-movie.com"
 __description__ = "AI-powered video generation from text descriptions"
 
-from .core.config import Config
-from .core.exceptions import VideoGenerationException
-
 __all__ = [
     "Config",
     "VideoGenerationException",
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    """按需导入顶层导出对象，避免 import ai_movie 时加载配置和日志模块"""
+    if name == "Config":
+        from .core.config import Config
+        return Config
+    if name == "VideoGenerationException":
+        from .core.exceptions import VideoGenerationException
+        return VideoGenerationException
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
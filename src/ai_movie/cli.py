@@ -9,24 +9,14 @@ For web interface:
     python -m ai_movie.web
 """
 
-import argparse
-import asyncio
+import os
 import sys
-from pathlib import Path
+from types import SimpleNamespace
 
-# 添加相对导入支持
-if __name__ == "__main__":
-    # 直接执行时，添加父目录到路径
-    import os
-    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from ai_movie.core.config import Config
-    from ai_movie.core.logging_config import get_logger
-    from ai_movie.core.video_workflow import generate_video_from_sentence
-else:
-    # 模块导入时使用相对导入
-    from .core.config import Config
-    from .core.logging_config import get_logger
-    from .core.video_workflow import generate_video_from_sentence
+# 需先以 `pip install -e .` 安装本包
+from ai_movie.core.config import Config
+from ai_movie.core.logging_config import get_logger
+from ai_movie.core.video_workflow import generate_video_from_sentence
 
 logger = get_logger(__name__)
 
@@ -64,8 +54,20 @@ async def generate_video_cli(input_text: str, character_image: str = None, outpu
         return None
 
 
-def main():
-    """Main CLI entry point"""
+_OPTION_DESTS = {
+    "--image": "image", "-i": "image",
+    "--output": "output", "-o": "output",
+    "--config": "config", "-c": "config",
+}
+_FLAG_DESTS = {
+    "--verbose": "verbose", "-v": "verbose",
+}
+
+
+def _build_parser():
+    """Build the full argparse parser (used for --help and error reporting)"""
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="AI Movie Generator - Transform text into videos",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -103,7 +105,50 @@ Examples:
         help="Enable verbose logging"
     )
     
-    args = parser.parse_args()
+    return parser
+
+
+def _fast_parse_args(argv: list[str]) -> SimpleNamespace | None:
+    """
+    Parse the common command line shapes without argparse.
+
+    Returns None for anything unusual (help, unknown options, missing values)
+    so the caller can fall back to argparse for proper help and error output.
+    """
+    args = {"text": None, "image": None, "output": None, "config": None, "verbose": False}
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg.startswith("-"):
+            option, has_value, value = arg.partition("=")
+            if option in _FLAG_DESTS and not has_value:
+                args[_FLAG_DESTS[option]] = True
+            elif option in _OPTION_DESTS:
+                if not has_value:
+                    i += 1
+                    if i >= len(argv):
+                        return None
+                    value = argv[i]
+                args[_OPTION_DESTS[option]] = value
+            else:
+                return None
+        elif args["text"] is None:
+            args["text"] = arg
+        else:
+            return None
+        i += 1
+    
+    if args["text"] is None:
+        return None
+    return SimpleNamespace(**args)
+
+
+def main():
+    """Main CLI entry point"""
+    argv = sys.argv[1:]
+    args = _fast_parse_args(argv)
+    if args is None:
+        args = _build_parser().parse_args(argv)
     
     # Configure logging level
     if args.verbose:
@@ -119,16 +164,28 @@ Examples:
         print("❌ Error: Text description cannot be empty")
         sys.exit(1)
     
-    if args.image and not Path(args.image).exists():
+    if args.image and not os.path.isfile(args.image):
         print(f"❌ Error: Image file not found: {args.image}")
         sys.exit(1)
     
     # Run video generation
-    result = asyncio.run(generate_video_cli(
-        input_text=args.text,
-        character_image=args.image,
-        output_dir=args.output
-    ))
+    import asyncio
+
+    loop = asyncio.new_event_loop()
+    try:
+        result = loop.run_until_complete(generate_video_cli(
+            input_text=args.text,
+            character_image=args.image,
+            output_dir=args.output
+        ))
+    finally:
+        # Wait for background tasks (e.g. post-processing cleanup) before closing the loop
+        pending = asyncio.all_tasks(loop)
+        if pending:
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
     
     sys.exit(0 if result else 1)
 
@@ -4,12 +4,13 @@ Core module for AI Movie Generator
 Contains fundamental classes and utilities.
 """
 
-from .config import Config
+from .config import Config, get_config
 from .exceptions import VideoGenerationException
 from .logging_config import get_logger
 
 __all__ = [
     "Config",
+    "get_config",
     "VideoGenerationException", 
     "get_logger",
 ]
\ No newline at end of file
@@ -0,0 +1,22 @@
+"""
+磁盘缓存
+
+分镜、语音合成等结果缓存在 ~/.cache/ai_movie 下的各子目录中，由 diskcache 按容量上限
+淘汰最久未使用的条目，长期运行的服务不会无限占用磁盘。
+"""
+import functools
+import os
+
+import diskcache
+
+_CACHE_ROOT = os.path.join(os.path.expanduser("~"), ".cache", "ai_movie")
+
+
+@functools.cache
+def get_disk_cache(name: str, size_limit_mb: int) -> diskcache.Cache:
+    """获取指定名称的磁盘缓存（进程内复用），超过 size_limit_mb 时按最近最少使用淘汰"""
+    return diskcache.Cache(
+        os.path.join(_CACHE_ROOT, name),
+        size_limit=size_limit_mb * 1024 * 1024,
+        eviction_policy="least-recently-used",
+    )
@@ -3,10 +3,18 @@ AI电影生成项目统一异常处理模块
 
 定义项目中使用的所有异常类型，提供统一的异常处理机制。
 """
+from typing import ClassVar
 
 class VideoGenerationException(Exception):
     """视频生成相关异常基类"""
     
+    # 异常类名 -> 异常类，用于从字典还原异常
+    _registry: ClassVar[dict[str, type["VideoGenerationException"]]] = {}
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        VideoGenerationException._registry[cls.__name__] = cls
+    
     def __init__(self, message: str, error_code: str | None = None, details: dict | None = None):
         self.message = message
         self.error_code = error_code or self.__class__.__name__
@@ -14,13 +22,22 @@ class VideoGenerationException(Exception):
         super().__init__(self.message)
     
     def to_dict(self):
-        """转换为字典格式，便于API返回"""
+        """转换为字典格式，便于API返回（每次返回新字典，调用方可自行修改）"""
         return {
             "error": self.message,
             "error_code": self.error_code,
             "details": self.details,
+            "type": type(self).__name__,
             "status": "failed"
         }
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> "VideoGenerationException":
+        """从 to_dict() 的结果还原异常，按 type 字段（异常类名）查找对应的异常类"""
+        exc_cls = cls._registry.get(data.get("type"), cls)
+        if not issubclass(exc_cls, cls):
+            exc_cls = cls
+        return exc_cls(data.get("error", ""), error_code=data.get("error_code"), details=data.get("details"))
 
 
 class APIException(VideoGenerationException):
@@ -70,4 +87,4 @@ class OSSException(VideoGenerationException):
 
 class WorkflowException(VideoGenerationException):
     """工作流执行异常"""
-    pass
\ No newline at end of file
+    __slots__ = ()
\ No newline at end of file
@@ -0,0 +1,52 @@
+"""
+JSON 解析工具
+
+安装 orjson（speedups 可选依赖）时使用其解析，否则回退到标准库 json。
+"""
+import json
+import re
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson 为可选依赖
+    orjson = None
+
+_JSON_TOKEN_RE = re.compile(r'[{}"\\]')
+
+
+def loads(text: str | bytes):
+    """解析 JSON，失败时抛出 json.JSONDecodeError（orjson 的异常是其子类）"""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def find_json_object(text: str) -> str | None:
+    """单次扫描返回文本中第一个括号配平的 JSON 对象子串，找不到时返回 None"""
+    start = text.find("{")
+    if start == -1:
+        return None
+
+    depth = 0
+    in_string = False
+    skip_pos = -1
+    # 只在花括号、引号、反斜杠处停留，字符串内的括号不计入层级
+    for match in _JSON_TOKEN_RE.finditer(text, start):
+        pos = match.start()
+        if pos == skip_pos:
+            continue
+        ch = text[pos]
+        if in_string:
+            if ch == "\\":
+                skip_pos = pos + 1
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:pos + 1]
+    return None
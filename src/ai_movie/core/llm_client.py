@@ -0,0 +1,46 @@
+"""
+大模型客户端管理模块
+
+在进程内复用 AsyncOpenAI 客户端（DashScope 兼容模式），避免每次调用都重新建立连接池和 TLS 握手。
+"""
+import asyncio
+import os
+import weakref
+
+from openai import AsyncOpenAI
+
+from .config import get_config
+
+# 底层 httpx 连接池绑定创建它的事件循环，按事件循环各保留一组客户端，
+# 每组再按 (api_key, base_url) 区分，API Key 变化时使用新的客户端
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple[str, str], AsyncOpenAI]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_llm_client() -> AsyncOpenAI:
+    """获取当前事件循环共享的 AsyncOpenAI 客户端（需在协程内调用）"""
+    loop = asyncio.get_running_loop()
+    config = get_config()
+    api_key = os.getenv("DASHSCOPE_API_KEY") or config.ai.dashscope_api_key
+    base_url = config.ai.dashscope_base_url
+
+    loop_clients = _clients.get(loop)
+    if loop_clients is None:
+        loop_clients = _clients[loop] = {}
+    client = loop_clients.get((api_key, base_url))
+    if client is None:
+        client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=config.ai.api_timeout,
+        )
+        loop_clients[(api_key, base_url)] = client
+    return client
+
+
+async def close_llm_clients() -> None:
+    """关闭当前事件循环上缓存的客户端，释放连接池（在事件循环结束前调用）"""
+    loop_clients = _clients.pop(asyncio.get_running_loop(), None)
+    if loop_clients:
+        await asyncio.gather(*(client.close() for client in loop_clients.values()), return_exceptions=True)
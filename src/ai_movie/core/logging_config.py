@@ -3,25 +3,55 @@ AI电影生成项目统一日志系统模块
 
 提供结构化日志记录功能，统一日志格式和处理机制。
 """
+import atexit
+import copy
+import functools
 import logging
 import logging.handlers
 import json
+import queue
 import sys
-from datetime import datetime
+import time
 from typing import Any, Dict, Optional
 from pathlib import Path
 
-from .config import config
+from .config import get_config
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选加速依赖
+    orjson = None
+
+
+def _dumps(data: Dict[str, Any]) -> str:
+    """序列化为JSON字符串，优先使用orjson"""
+    if orjson is not None:
+        return orjson.dumps(data).decode('utf-8')
+    return json.dumps(data, ensure_ascii=False)
 
 
 class StructuredFormatter(logging.Formatter):
     """结构化日志格式化器"""
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 缓存最近一秒的时间前缀，同一秒内的日志无需重复格式化
+        self._time_cache: tuple[int, str] = (-1, '')
+    
+    def _format_timestamp(self, created: float) -> str:
+        """格式化为ISO 8601本地时间（微秒精度）"""
+        second = int(created)
+        cached_second, prefix = self._time_cache
+        if second != cached_second:
+            prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(second))
+            self._time_cache = (second, prefix)
+        return f"{prefix}.{int((created - second) * 1_000_000):06d}"
+    
     def format(self, record: logging.LogRecord) -> str:
         """格式化日志记录"""
         # 基础日志信息
         log_data = {
-            'timestamp': datetime.fromtimestamp(record.created).isoformat(),
+            'timestamp': self._format_timestamp(record.created),
             'level': record.levelname,
             'logger': record.name,
             'message': record.getMessage(),
@@ -40,8 +70,8 @@ class StructuredFormatter(logging.Formatter):
             log_data.update(extra_data)
         
         # 根据配置选择输出格式
-        if config.logging.json_format:
-            return json.dumps(log_data, ensure_ascii=False)
+        if get_config().logging.json_format:
+            return _dumps(log_data)
         else:
             # 传统格式
             msg = f"[{log_data['timestamp']}] {log_data['level']} - {log_data['logger']} - {log_data['message']}"
@@ -50,6 +80,67 @@ class StructuredFormatter(logging.Formatter):
             return msg
 
 
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    保留异常信息的队列处理器
+    
+    标准 QueueHandler.prepare 会先格式化日志并清空 exc_info，异常堆栈因此被并入 message，
+    后台线程中的结构化格式化器无法再单独输出 exception 字段。这里只合并消息参数，
+    异常信息原样交给后台处理器的格式化器处理。
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+@functools.cache
+def _get_queue_handler() -> logging.handlers.QueueHandler:
+    """
+    获取共享的队列日志处理器
+    
+    调用方只把日志记录放入内存队列，由后台 QueueListener 线程负责
+    格式化并写入控制台和文件，避免在业务线程（包括事件循环）中做I/O。
+    """
+    log_config = get_config().logging
+    
+    # 创建格式化器
+    if log_config.structured_logging:
+        formatter = StructuredFormatter()
+    else:
+        formatter = logging.Formatter(log_config.format)
+    
+    # 控制台处理器
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(formatter)
+    handlers: list[logging.Handler] = [console_handler]
+    
+    # 文件处理器（如果配置了文件路径）
+    if log_config.file_path:
+        # 确保日志目录存在
+        log_file_path = Path(log_config.file_path)
+        log_file_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # 使用轮转文件处理器
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file_path,
+            maxBytes=log_config.max_file_size,
+            backupCount=log_config.backup_count,
+            encoding='utf-8'
+        )
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+    
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    
+    return _QueueHandler(log_queue)
+
+
 class VideoGenerationLogger:
     """视频生成专用日志记录器"""
     
@@ -64,86 +155,53 @@ class VideoGenerationLogger:
             return
         
         # 设置日志级别
-        self.logger.setLevel(getattr(logging, config.logging.level.upper()))
+        self.logger.setLevel(getattr(logging, get_config().logging.level.upper()))
         
-        # 创建格式化器
-        if config.logging.structured_logging:
-            formatter = StructuredFormatter()
-        else:
-            formatter = logging.Formatter(config.logging.format)
-        
-        # 控制台处理器
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setFormatter(formatter)
-        self.logger.addHandler(console_handler)
-        
-        # 文件处理器（如果配置了文件路径）
-        if config.logging.file_path:
-            # 确保日志目录存在
-            log_file_path = Path(config.logging.file_path)
-            log_file_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # 使用轮转文件处理器
-            file_handler = logging.handlers.RotatingFileHandler(
-                log_file_path,
-                maxBytes=config.logging.max_file_size,
-                backupCount=config.logging.backup_count,
-                encoding='utf-8'
-            )
-            file_handler.setFormatter(formatter)
-            self.logger.addHandler(file_handler)
+        # 日志通过共享队列交给后台线程输出
+        self.logger.addHandler(_get_queue_handler())
         
         # 防止日志传播到根记录器
         self.logger.propagate = False
     
-    def _log_with_context(self, level: int, msg: str, **kwargs):
-        """带上下文的日志记录"""
-        extra_data = {}
+    def _log_with_context(self, level: int, msg: str, *args, **kwargs):
+        """带上下文的日志记录（args 按 %s 风格延迟格式化到 msg 中）"""
+        # 级别未启用时直接返回，避免构建上下文数据
+        if not self.logger.isEnabledFor(level):
+            return
         
-        # 提取特殊参数
-        user_id = kwargs.pop('user_id', None)
-        video_id = kwargs.pop('video_id', None)
-        task_id = kwargs.pop('task_id', None)
-        duration = kwargs.pop('duration', None)
-        error = kwargs.pop('error', None)
+        # 没有上下文字段时不向LogRecord注入extra
+        if not kwargs:
+            self.logger.log(level, msg, *args)
+            return
         
-        # 构建额外数据
-        if user_id is not None:
-            extra_data['user_id'] = user_id
-        if video_id is not None:
-            extra_data['video_id'] = video_id
-        if task_id is not None:
-            extra_data['task_id'] = task_id
-        if duration is not None:
-            extra_data['duration'] = duration
-        if error is not None:
+        # 构建额外数据（忽略值为None的字段）
+        extra_data = {k: v for k, v in kwargs.items() if v is not None}
+        error = extra_data.get('error')
+        if error is not None and not isinstance(error, str):
             extra_data['error'] = str(error)
         
-        # 添加其他自定义字段
-        extra_data.update(kwargs)
-        
         # 记录日志
-        self.logger.log(level, msg, extra={'extra_data': extra_data})
+        self.logger.log(level, msg, *args, extra={'extra_data': extra_data} if extra_data else None)
     
-    def debug(self, msg: str, **kwargs):
+    def debug(self, msg: str, *args, **kwargs):
         """调试日志"""
-        self._log_with_context(logging.DEBUG, msg, **kwargs)
+        self._log_with_context(logging.DEBUG, msg, *args, **kwargs)
     
-    def info(self, msg: str, **kwargs):
+    def info(self, msg: str, *args, **kwargs):
         """信息日志"""
-        self._log_with_context(logging.INFO, msg, **kwargs)
+        self._log_with_context(logging.INFO, msg, *args, **kwargs)
     
-    def warning(self, msg: str, **kwargs):
+    def warning(self, msg: str, *args, **kwargs):
         """警告日志"""
-        self._log_with_context(logging.WARNING, msg, **kwargs)
+        self._log_with_context(logging.WARNING, msg, *args, **kwargs)
     
-    def error(self, msg: str, **kwargs):
+    def error(self, msg: str, *args, **kwargs):
         """错误日志"""
-        self._log_with_context(logging.ERROR, msg, **kwargs)
+        self._log_with_context(logging.ERROR, msg, *args, **kwargs)
     
-    def critical(self, msg: str, **kwargs):
+    def critical(self, msg: str, *args, **kwargs):
         """严重错误日志"""
-        self._log_with_context(logging.CRITICAL, msg, **kwargs)
+        self._log_with_context(logging.CRITICAL, msg, *args, **kwargs)
     
     def log_request_start(self, endpoint: str, method: str, **kwargs):
         """记录请求开始"""
@@ -208,25 +266,42 @@ class VideoGenerationLogger:
 
 
 # 预定义的日志记录器
+@functools.cache
 def get_logger(name: str) -> VideoGenerationLogger:
-    """获取日志记录器"""
+    """获取日志记录器（同名记录器只创建一次）"""
     return VideoGenerationLogger(name)
 
 
-# 常用日志记录器
-app_logger = get_logger('ai_movie.app')
-workflow_logger = get_logger('ai_movie.workflow')
-api_logger = get_logger('ai_movie.api')
-db_logger = get_logger('ai_movie.database')
-video_logger = get_logger('ai_movie.video_processing')
-audio_logger = get_logger('ai_movie.audio_processing')
+# 常用日志记录器，首次访问时才创建
+_NAMED_LOGGERS = {
+    'app_logger': 'ai_movie.app',
+    'workflow_logger': 'ai_movie.workflow',
+    'api_logger': 'ai_movie.api',
+    'db_logger': 'ai_movie.database',
+    'video_logger': 'ai_movie.video_processing',
+    'audio_logger': 'ai_movie.audio_processing',
+}
+
+
+def __getattr__(name: str) -> VideoGenerationLogger:
+    logger_name = _NAMED_LOGGERS.get(name)
+    if logger_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return get_logger(logger_name)
+
+
+_setup_done = False
 
 
 def setup_logging():
-    """设置全局日志配置"""
+    """设置全局日志配置（重复调用时直接返回）"""
+    global _setup_done
+    if _setup_done:
+        return
+    _setup_done = True
+    
     # 设置第三方库的日志级别
-    logging.getLogger('urllib3').setLevel(logging.WARNING)
-    logging.getLogger('requests').setLevel(logging.WARNING)
-    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    for name in ('urllib3', 'requests', 'werkzeug'):
+        logging.getLogger(name).setLevel(logging.WARNING)
     
-    app_logger.info("日志系统初始化完成", log_level=config.logging.level)
\ No newline at end of file
+    get_logger('ai_movie.app').info("日志系统初始化完成", log_level=get_config().logging.level)
\ No newline at end of file
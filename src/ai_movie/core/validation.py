@@ -3,27 +3,50 @@ AI电影生成项目输入验证模块
 
 使用Pydantic进行数据验证，确保输入数据的正确性和完整性。
 """
+import os
+import re
 from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, validator, Field
+from pydantic import (
+    AliasChoices, BaseModel, ConfigDict, Field, TypeAdapter, ValidationError, field_validator, model_validator,
+)
 from werkzeug.datastructures import FileStorage
 
 from .exceptions import ValidationException
 
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+# 用户名中允许的分隔符，校验时先删除再检查其余字符
+_USERNAME_SEPARATORS = str.maketrans('', '', '_-')
+_ALLOWED_IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.bmp', '.gif'})
+
 
 class VideoGenerationRequest(BaseModel):
     """视频生成请求数据模型"""
     
-    input_text: str = Field(..., description="用户输入的文本内容")
+    input_text: str = Field(
+        ...,
+        validation_alias=AliasChoices('input_text', 'input'),
+        description="用户输入的文本内容（兼容旧字段名 input）"
+    )
     title: str = Field(default="未命名视频", description="视频标题")
     dashscope_api_key: Optional[str] = Field(None, description="DashScope API密钥")
     
-    class Config:
-        # 允许额外字段
-        extra = "forbid"
-        # 字段别名
-        allow_population_by_field_name = True
+    # 禁止额外字段，允许按字段名填充
+    model_config = ConfigDict(extra="forbid", populate_by_name=True)
+    
+    @model_validator(mode='before')
+    @classmethod
+    def reject_duplicate_input(cls, data):
+        """同时提供 input 和 input_text 时拒绝请求，不静默丢弃其中一个"""
+        if isinstance(data, dict) and 'input' in data and 'input_text' in data:
+            raise ValidationException(
+                '不能同时提供 input 和 input_text 字段',
+                error_code='DUPLICATE_INPUT_TEXT',
+                details={'fields': ['input', 'input_text']}
+            )
+        return data
     
-    @validator('input_text')
+    @field_validator('input_text')
+    @classmethod
     def validate_input_text(cls, v):
         """验证输入文本"""
         if not v or not v.strip():
@@ -49,7 +72,8 @@ class VideoGenerationRequest(BaseModel):
         
         return v
     
-    @validator('title')
+    @field_validator('title')
+    @classmethod
     def validate_title(cls, v):
         """验证标题"""
         if v:
@@ -62,7 +86,8 @@ class VideoGenerationRequest(BaseModel):
                 )
         return v or "未命名视频"
     
-    @validator('dashscope_api_key')
+    @field_validator('dashscope_api_key')
+    @classmethod
     def validate_api_key(cls, v):
         """验证API密钥格式"""
         if v and v.strip():
@@ -109,15 +134,14 @@ class VideoGenerationWithImageRequest(VideoGenerationRequest):
             return  # 文件是可选的
         
         # 检查文件扩展名
-        allowed_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.gif'}
-        file_ext = '.' + file_obj.filename.rsplit('.', 1)[-1].lower()
+        file_ext = os.path.splitext(file_obj.filename)[1].lower()
         
-        if file_ext not in allowed_extensions:
+        if file_ext not in _ALLOWED_IMAGE_EXTENSIONS:
             raise ValidationException(
                 f'不支持的图片格式：{file_ext}',
                 error_code='UNSUPPORTED_IMAGE_FORMAT',
                 details={
-                    'allowed_formats': list(allowed_extensions),
+                    'allowed_formats': sorted(_ALLOWED_IMAGE_EXTENSIONS),
                     'received_format': file_ext
                 }
             )
@@ -143,13 +167,14 @@ class UserRegistrationRequest(BaseModel):
     email: str = Field(..., description="邮箱地址")
     password: str = Field(..., min_length=6, description="密码")
     
-    @validator('username')
+    @field_validator('username')
+    @classmethod
     def validate_username(cls, v):
         """验证用户名"""
         v = v.strip()
         
         # 检查用户名字符
-        if not v.replace('_', '').replace('-', '').isalnum():
+        if not v.translate(_USERNAME_SEPARATORS).isalnum():
             raise ValidationException(
                 '用户名只能包含字母、数字、下划线和短横线',
                 error_code='INVALID_USERNAME_FORMAT'
@@ -157,15 +182,13 @@ class UserRegistrationRequest(BaseModel):
         
         return v
     
-    @validator('email')
+    @field_validator('email')
+    @classmethod
     def validate_email(cls, v):
         """验证邮箱格式"""
-        import re
-        
         v = v.strip().lower()
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
         
-        if not re.match(email_pattern, v):
+        if not _EMAIL_RE.match(v):
             raise ValidationException(
                 '邮箱格式不正确',
                 error_code='INVALID_EMAIL_FORMAT'
@@ -173,7 +196,8 @@ class UserRegistrationRequest(BaseModel):
         
         return v
     
-    @validator('password')
+    @field_validator('password')
+    @classmethod
     def validate_password(cls, v):
         """验证密码强度"""
         if len(v) < 6:
@@ -197,7 +221,8 @@ class UserLoginRequest(BaseModel):
     email: str = Field(..., description="邮箱地址")
     password: str = Field(..., description="密码")
     
-    @validator('email')
+    @field_validator('email')
+    @classmethod
     def validate_email(cls, v):
         """验证邮箱"""
         if not v or not v.strip():
@@ -207,7 +232,8 @@ class UserLoginRequest(BaseModel):
             )
         return v.strip().lower()
     
-    @validator('password')
+    @field_validator('password')
+    @classmethod
     def validate_password(cls, v):
         """验证密码"""
         if not v or not v.strip():
@@ -224,7 +250,8 @@ class PaginationRequest(BaseModel):
     page: int = Field(default=1, ge=1, description="页码")
     per_page: int = Field(default=10, ge=1, le=100, description="每页数量")
     
-    @validator('per_page')
+    @field_validator('per_page')
+    @classmethod
     def validate_per_page(cls, v):
         """验证每页数量"""
         if v > 100:
@@ -236,31 +263,83 @@ class PaginationRequest(BaseModel):
         return v
 
 
-def validate_request_data(model_class, data: dict):
-    """通用请求数据验证函数"""
+# 模型类 -> TypeAdapter 缓存，首次使用时构建
+_ADAPTERS: Dict[type, TypeAdapter] = {}
+
+
+def _get_adapter(model_class) -> TypeAdapter:
+    """获取（并缓存）模型对应的 TypeAdapter"""
+    adapter = _ADAPTERS.get(model_class)
+    if adapter is None:
+        adapter = _ADAPTERS[model_class] = TypeAdapter(model_class)
+    return adapter
+
+
+def _to_validation_exception(e: ValidationError) -> ValidationException:
+    """将 Pydantic 验证错误转换为项目统一的验证异常"""
+    error_details = [
+        {
+            'field': '.'.join(str(loc) for loc in error['loc']),
+            'message': error['msg'],
+            'type': error['type']
+        }
+        for error in e.errors()
+    ]
+    
+    return ValidationException(
+        '输入数据验证失败',
+        error_code='VALIDATION_ERROR',
+        details={'errors': error_details}
+    )
+
+
+def validate_request_data(model_class, data: dict, *, trusted: bool = False):
+    """
+    通用请求数据验证函数
+    
+    Args:
+        model_class: Pydantic模型类
+        data: 待验证的数据
+        trusted: 数据是否来自内部可信来源。为True且模型没有自定义字段验证器时，
+            使用 model_construct 跳过验证；外部请求数据必须保持默认值False
+    """
     try:
-        return model_class(**data)
-    except ValueError as e:
+        if trusted and not model_class.__pydantic_decorators__.field_validators:
+            return model_class.model_construct(**data)
+        return _get_adapter(model_class).validate_python(data)
+    except ValidationError as e:
         # Pydantic 验证错误
-        error_details = []
-        if hasattr(e, 'errors'):
-            for error in e.errors():
-                error_details.append({
-                    'field': '.'.join(str(loc) for loc in error['loc']),
-                    'message': error['msg'],
-                    'type': error['type']
-                })
-        
+        raise _to_validation_exception(e)
+    except ValidationException:
+        # 自定义验证异常直接抛出
+        raise
+    except Exception as e:
+        raise ValidationException(
+            f'数据验证过程中发生未知错误: {str(e)}',
+            error_code='UNKNOWN_VALIDATION_ERROR'
+        )
+
+
+def validate_request_json(model_class, raw: bytes | str):
+    """
+    直接从请求体的JSON原始字节验证数据
+    
+    由 pydantic-core 一次完成JSON解析和验证，不再先构建中间的Python字典。
+    """
+    if not raw:
         raise ValidationException(
-            '输入数据验证失败',
-            error_code='VALIDATION_ERROR',
-            details={'errors': error_details}
+            "请提供有效的JSON数据",
+            error_code="INVALID_JSON_DATA"
         )
+    
+    try:
+        return _get_adapter(model_class).validate_json(raw)
+    except ValidationError as e:
+        raise _to_validation_exception(e)
     except ValidationException:
-        # 自定义验证异常直接抛出
         raise
     except Exception as e:
         raise ValidationException(
             f'数据验证过程中发生未知错误: {str(e)}',
             error_code='UNKNOWN_VALIDATION_ERROR'
-        )
\ No newline at end of file
+        )
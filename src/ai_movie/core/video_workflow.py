@@ -1,25 +1,36 @@
 import datetime
+import functools
 import os
 
-import dashscope
-from dotenv import load_dotenv
 from langgraph.graph import END, StateGraph
 
-from ..nodes.copywriting_generation import copywriting_generation_node
-from ..nodes.input_parsing import input_parsing_node
-from ..nodes.post_processing_node import post_processing_node
-from ..nodes.quality_check import quality_check_node
 from ..nodes.state import VideoGenerationState
-from ..nodes.storyboard_generation import storyboard_generation_node
-from ..nodes.video_concatenation import video_concatenation_node
-from ..nodes.video_generation import video_generation_node
-from ..nodes.voiceover_generation import voiceover_generation_node
 
-load_dotenv()
-dashscope.api_key = os.environ.get("DASHSCOPE_API_KEY", "")
+
+@functools.cache
+def _configure_dashscope() -> None:
+    """加载 .env 并设置 DashScope API 密钥（首次运行工作流时执行一次）"""
+    import dashscope
+
+    from .config import get_config
+
+    get_config()  # 首次调用时加载 .env
+    dashscope.api_key = os.environ.get("DASHSCOPE_API_KEY", "")
 
 
 def create_video_generation_workflow():
+    # 节点模块（及其 openai / dashscope 依赖）在构建工作流时才导入
+    from ..nodes import (
+        copywriting_generation_node,
+        input_parsing_node,
+        post_processing_node,
+        quality_check_node,
+        storyboard_generation_node,
+        video_concatenation_node,
+        video_generation_node,
+        voiceover_generation_node,
+    )
+
     # Initialize the graph
     workflow = StateGraph(VideoGenerationState)
 
@@ -38,11 +49,12 @@ def create_video_generation_workflow():
     # Add edges
     workflow.add_edge("input_parsing", "copywriting_generation")
     workflow.add_edge("copywriting_generation", "storyboard_generation")
+    # 配音和视频生成只依赖分镜结果，并行执行，两者都完成后再合并
     workflow.add_edge("storyboard_generation", "voiceover_generation")
-    workflow.add_edge("voiceover_generation", "video_generation")
+    workflow.add_edge("storyboard_generation", "video_generation")
     # workflow.add_edge("voiceover_generation", "subtitle_generation")
     # workflow.add_edge("subtitle_generation", "video_generation")
-    workflow.add_edge("video_generation", "video_concatenation")
+    workflow.add_edge(["voiceover_generation", "video_generation"], "video_concatenation")
     workflow.add_edge("video_concatenation", "quality_check")
     workflow.add_edge("quality_check", "post_processing")
     workflow.add_edge("post_processing", END)
@@ -54,11 +66,82 @@ def create_video_generation_workflow():
     return workflow.compile()
 
 
+# 初始状态模板（仅含不可变默认值），每次运行复制后再填入本次的输入
+_INITIAL_STATE_TEMPLATE: dict = {
+    "input_text": "",
+    "character_image_path": None,
+    "video_topic": "",
+    "title": "",
+    "copywriting": "",
+    "subtitle_file": "",
+    "final_video": "",
+    "quality_analysis": "",
+    "quality_acceptable": False,
+    "current_step": "",
+    "root_dir": None,
+
+    # 初始化进度跟踪字段
+    "parsing_started_at": None,
+    "parsing_completed_at": None,
+    "parsing_status": "pending",
+
+    "storyboard_started_at": None,
+    "storyboard_completed_at": None,
+    "storyboard_status": "pending",
+
+    "generation_started_at": None,
+    "generation_completed_at": None,
+    "generation_status": "pending",
+
+    "concatenation_started_at": None,
+    "concatenation_completed_at": None,
+    "concatenation_status": "pending",
+
+    "oss_upload_started_at": None,
+    "oss_upload_completed_at": None,
+    "oss_upload_status": "pending",
+
+    # 用户信息
+    "user_id": 0,
+    "username": None,
+    "email": None,
+
+    # 视频数据库记录信息
+    "video_db_id": None,
+    "video_status": "pending",
+    "video_error": None,
+
+    # 其他字段
+    "target_duration": None,
+    "oss_url": "",
+    "oss_request_id": "",
+    "state_csv_path": "",
+}
+
+# 列表类型字段，每次运行单独创建，避免不同运行之间共享同一个列表
+_LIST_FIELDS = (
+    "keywords",
+    "storyboard",
+    "dialogues",
+    "prompts",
+    "audio_files",
+    "video_segments",
+    "messages",
+    "files_deleted",
+    "dirs_deleted",
+    "cleanup_errors",
+)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_compiled_workflow():
+    """获取编译好的工作流（只在首次调用时构建，编译结果可并发复用）"""
+    return create_video_generation_workflow()
+
+
 async def generate_video_from_sentence(input_text: str, character_image_path: str | None = None):
     """Main function to generate a video from a single sentence and optional character image"""
     # Create root timestamp-based directory for this workflow run
-    import os
-
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     root_dir = os.path.join("./output", timestamp)
     os.makedirs(root_dir, exist_ok=True)
@@ -69,68 +152,24 @@ async def generate_video_from_sentence(input_text: str, character_image_path: st
     os.makedirs(audio_dir, exist_ok=True)
     os.makedirs(video_dir, exist_ok=True)
 
-    # Create the workflow
-    app = create_video_generation_workflow()
-
-    # Initialize state with progress tracking fields
-    initial_state = VideoGenerationState(
-        input_text=input_text,
-        character_image_path=character_image_path,
-        video_topic="",
-        keywords=[],
-        title="",
-        copywriting="",
-        storyboard=[],
-        audio_files=[],
-        subtitle_file="",
-        video_segments=[],
-        final_video="",
-        quality_analysis="",
-        quality_acceptable=False,
-        current_step="",
-        messages=[],
-        root_dir=root_dir,
-        
-        # 初始化进度跟踪字段
-        parsing_started_at=None,
-        parsing_completed_at=None,
-        parsing_status="pending",
-        
-        storyboard_started_at=None,
-        storyboard_completed_at=None,
-        storyboard_status="pending",
-        
-        generation_started_at=None,
-        generation_completed_at=None,
-        generation_status="pending",
-        
-        concatenation_started_at=None,
-        concatenation_completed_at=None,
-        concatenation_status="pending",
-        
-        oss_upload_started_at=None,
-        oss_upload_completed_at=None,
-        oss_upload_status="pending",
-        
-        # 用户信息
-        user_id=0,
-        username=None,
-        email=None,
-        
-        # 视频数据库记录信息
-        video_db_id=None,
-        video_status="pending",
-        video_error=None,
-        
-        # 其他字段
-        target_duration=None,
-        oss_url="",
-        oss_request_id="",
-        state_csv_path="",
-        files_deleted=[],
-        dirs_deleted=[],
-        cleanup_errors=[],
-    )
+    # Get the (cached) compiled workflow
+    _configure_dashscope()
+    app = _get_compiled_workflow()
+
+    # Initialize state from the template; list fields get fresh objects per run
+    initial_state: VideoGenerationState = _INITIAL_STATE_TEMPLATE.copy()
+    for key in _LIST_FIELDS:
+        initial_state[key] = []
+    initial_state["media_durations"] = {}
+    initial_state["input_text"] = input_text
+    initial_state["character_image_path"] = character_image_path
+    initial_state["root_dir"] = root_dir
+
+    from .llm_client import close_llm_clients
 
-    final_state = await app.ainvoke(initial_state)
+    try:
+        final_state = await app.ainvoke(initial_state)
+    finally:
+        # 本次运行结束后关闭各节点共用的大模型客户端
+        await close_llm_clients()
     return final_state
\ No newline at end of file
@@ -4,14 +4,19 @@ Video generation workflow nodes
 Contains all the processing nodes for the video generation pipeline.
 """
 
-from .input_parsing import input_parsing_node
-from .copywriting_generation import copywriting_generation_node
-from .storyboard_generation import storyboard_generation_node
-from .voiceover_generation import voiceover_generation_node
-from .video_generation import video_generation_node
-from .video_concatenation import video_concatenation_node
-from .quality_check import quality_check_node
-from .post_processing_node import post_processing_node
+import importlib
+
+# 导出名 -> 所在子模块，按需导入，只加载实际用到的节点及其依赖
+_NODE_MODULES = {
+    "input_parsing_node": "input_parsing",
+    "copywriting_generation_node": "copywriting_generation",
+    "storyboard_generation_node": "storyboard_generation",
+    "voiceover_generation_node": "voiceover_generation",
+    "video_generation_node": "video_generation",
+    "video_concatenation_node": "video_concatenation",
+    "quality_check_node": "quality_check",
+    "post_processing_node": "post_processing_node",
+}
 
 __all__ = [
     "input_parsing_node",
@@ -22,4 +27,17 @@ __all__ = [
     "video_concatenation_node",
     "quality_check_node",
     "post_processing_node",
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    module_name = _NODE_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
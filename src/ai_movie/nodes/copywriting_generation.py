@@ -2,12 +2,12 @@ import json
 import os
 from typing import Any
 
-from openai import OpenAI
-
 from .state import VideoGenerationState
+from ai_movie.core import json_utils
 from ai_movie.core.exceptions import APIException, DashScopeAPIException
 from ai_movie.core.logging_config import workflow_logger
-from ai_movie.core.config import config
+from ai_movie.core.config import get_config
+from ai_movie.core.llm_client import get_llm_client
 
 
 async def copywriting_generation_node(state: VideoGenerationState) -> dict[str, Any]:
@@ -19,6 +19,7 @@ async def copywriting_generation_node(state: VideoGenerationState) -> dict[str,
     response_text = None  # 初始化变量
     
     try:
+        config = get_config()
         # 使用配置管理的API密钥和配置
         api_key = os.getenv("DASHSCOPE_API_KEY") or config.ai.dashscope_api_key
         if not api_key:
@@ -27,10 +28,7 @@ async def copywriting_generation_node(state: VideoGenerationState) -> dict[str,
                 error_code="DASHSCOPE_API_KEY_MISSING"
             )
         
-        client = OpenAI(
-            api_key=api_key,
-            base_url=config.ai.dashscope_base_url,
-        )
+        client = get_llm_client()
 
         prompt = f"""
         请为以下视频主题创作一个网感标题和一段200字以内的视频文案：
@@ -49,7 +47,7 @@ async def copywriting_generation_node(state: VideoGenerationState) -> dict[str,
         }}
         """
 
-        completion = client.chat.completions.create(
+        completion = await client.chat.completions.create(
             model=config.ai.text_model,
             messages=[
                 {
@@ -69,7 +67,7 @@ async def copywriting_generation_node(state: VideoGenerationState) -> dict[str,
                 error_code="EMPTY_API_RESPONSE"
             )
         
-        response_data = json.loads(response_text)
+        response_data = json_utils.loads(response_text)
 
         title = response_data.get("title", "")
         copywriting = response_data.get("copywriting", "")
@@ -1,11 +1,9 @@
 import datetime
-import json
-import os
 from typing import Any
 
-from openai import OpenAI
-
 from .state import VideoGenerationState
+from ai_movie.core import json_utils
+from ai_movie.core.llm_client import get_llm_client
 
 
 async def input_parsing_node(state: VideoGenerationState) -> dict[str, Any]:
@@ -14,11 +12,6 @@ async def input_parsing_node(state: VideoGenerationState) -> dict[str, Any]:
     # 记录开始时间
     start_time = datetime.datetime.now().isoformat()
 
-    client = OpenAI(
-        api_key=os.getenv("DASHSCOPE_API_KEY"),
-        base_url="https://dashscope.aliyuncs.com/compatible-mode/v1",
-    )
-
     prompt = f"""
     请将以下用户输入扩展为一个视频主题，并提取3个相关的关键词：
     
@@ -32,7 +25,8 @@ async def input_parsing_node(state: VideoGenerationState) -> dict[str, Any]:
     """
 
     try:
-        completion = client.chat.completions.create(
+        client = get_llm_client()
+        completion = await client.chat.completions.create(
             model="qwen-plus",
             messages=[
                 {
@@ -45,7 +39,7 @@ async def input_parsing_node(state: VideoGenerationState) -> dict[str, Any]:
         )
 
         response_text = completion.choices[0].message.content
-        response_data = json.loads(response_text)
+        response_data = json_utils.loads(response_text)
 
         video_topic = response_data.get("video_topic", "")
         keywords = response_data.get("keywords", [])
@@ -1,14 +1,21 @@
+import asyncio
+import csv
 import datetime
+import json
 import os
 import shutil
+import sys
 from typing import Any
 
-import pandas as pd
-
 from ..web.models import Video, db
 from ..utils.oss import upload_to_oss
 from .state import VideoGenerationState
 
+# shutil.rmtree 的错误回调参数：onerror 自 Python 3.12 起弃用，改用 onexc
+_RMTREE_ERROR_ARG = "onexc" if sys.version_info >= (3, 12) else "onerror"
+
+# 后台清理任务的强引用，防止任务在完成前被垃圾回收
+_background_tasks: set[asyncio.Task] = set()
 
 
 def save_state_to_csv(state: dict[str, Any], file_path: str) -> dict[str, Any]:
@@ -17,13 +24,18 @@ def save_state_to_csv(state: dict[str, Any], file_path: str) -> dict[str, Any]:
         # 确保目录存在
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
         
-        # 如果文件不存在，写入表头
-        mode = 'a' if os.path.exists(file_path) else 'w'
-        header = not os.path.exists(file_path)
+        file_exists = os.path.exists(file_path)
         
-        # 将状态转换为DataFrame并追加写入CSV
-        df = pd.DataFrame([state])
-        df.to_csv(file_path, mode=mode, header=header, index=False)
+        # 追加写入一行，文件不存在时先写入表头；非标量字段序列化为JSON
+        with open(file_path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(state.keys()))
+            if not file_exists:
+                writer.writeheader()
+            writer.writerow({
+                key: value if isinstance(value, (str, int, float, bool, type(None)))
+                else json.dumps(value, ensure_ascii=False, default=str)
+                for key, value in state.items()
+            })
         
         return {
             "state_csv_path": file_path,
@@ -37,11 +49,22 @@ def save_state_to_csv(state: dict[str, Any], file_path: str) -> dict[str, Any]:
         }
 
 
-def cleanup_files(root_dir: str, keep_dirs: list = None) -> dict[str, Any]:
+def _report_cleanup(task: asyncio.Task) -> None:
+    """后台清理结束后释放任务引用，并输出清理失败的信息"""
+    _background_tasks.discard(task)
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc is not None:
+        print(f"Cleanup failed: {exc}")
+        return
+    errors = task.result()["errors"]
+    if errors:
+        print(f"Cleanup finished with {len(errors)} error(s): {errors}")
+
+
+def cleanup_files(root_dir: str, keep_dirs: frozenset[str] = frozenset({'output'})) -> dict[str, Any]:
     """清理源文件"""
-    if keep_dirs is None:
-        keep_dirs = ['output']
-    
     result = {
         "files_deleted": [],
         "dirs_deleted": [],
@@ -49,38 +72,51 @@ def cleanup_files(root_dir: str, keep_dirs: list = None) -> dict[str, Any]:
     }
     
     try:
-        if not os.path.exists(root_dir):
+        def _on_error(func, path, exc):
+            # onexc 传入异常对象，旧版本的 onerror 传入 exc_info 元组
+            if isinstance(exc, tuple):
+                exc = exc[1]
+            result["errors"].append(f"{func.__name__} failed: {path} - {exc}")
+            # 删除失败的路径不计入已删除列表；目录无法打开或遍历时，其下内容也未被删除
+            prefix = None if func in (os.rmdir, os.unlink, os.remove) else path + os.sep
+
+            def removed(p: str) -> bool:
+                return p == path or (prefix is not None and p.startswith(prefix))
+
+            for key in ("files_deleted", "dirs_deleted"):
+                result[key] = [p for p in result[key] if not removed(p)]
+
+        def _scan(path: str) -> None:
+            # 删除前用 scandir 记录待删除的文件和目录（目录按从下到上的顺序）
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        _scan(entry.path)
+                        result["dirs_deleted"].append(entry.path)
+                    else:
+                        result["files_deleted"].append(entry.path)
+
+        # 直接扫描，目录不存在时由 scandir 报错，省去单独的 exists 检查
+        try:
+            _scan(root_dir)
+        except FileNotFoundError:
             result["errors"].append(f"Directory not found: {root_dir}")
             return result
 
-        # 遍历目录树，从下到上删除
-        for root, dirs, files in os.walk(root_dir, topdown=False):
-            # 删除文件
-            for name in files:
-                file_path = os.path.join(root, name)
-                try:
-                    os.remove(file_path)
-                    result["files_deleted"].append(file_path)
-                except Exception as e:
-                    result["errors"].append(f"File delete failed: {file_path} - {e}")
-            
-            # 删除空目录
-            dir_path = root
-            if os.path.basename(dir_path) not in keep_dirs:
-                try:
-                    # 如果目录非空，shutil.rmtree
-                    if not os.listdir(dir_path):
-                        os.rmdir(dir_path)
-                        result["dirs_deleted"].append(dir_path)
+        if os.path.basename(root_dir) not in keep_dirs:
+            result["dirs_deleted"].append(root_dir)
+            shutil.rmtree(root_dir, **{_RMTREE_ERROR_ARG: _on_error})
+        else:
+            # 保留根目录本身，只清空其内容
+            with os.scandir(root_dir) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        shutil.rmtree(entry.path, **{_RMTREE_ERROR_ARG: _on_error})
                     else:
-                        # 非空目录尝试用rmtree删除
                         try:
-                            shutil.rmtree(dir_path)
-                            result["dirs_deleted"].append(dir_path)
-                        except Exception as e:
-                            result["errors"].append(f"Dir delete failed (non-empty): {dir_path} - {e}")
-                except OSError as e:
-                    result["errors"].append(f"Dir delete failed: {dir_path} - {e}")
+                            os.remove(entry.path)
+                        except OSError as e:
+                            _on_error(os.remove, entry.path, e)
         
         return result
     except Exception as e:
@@ -88,7 +124,7 @@ def cleanup_files(root_dir: str, keep_dirs: list = None) -> dict[str, Any]:
         return result
 
 
-def post_processing_node(state: VideoGenerationState) -> dict[str, Any]:
+async def post_processing_node(state: VideoGenerationState) -> dict[str, Any]:
     """后处理节点：上传OSS、保存状态、清理文件"""
     # 记录OSS上传开始时间
     # oss_upload_start_time = datetime.datetime.now().isoformat()
@@ -120,7 +156,7 @@ def post_processing_node(state: VideoGenerationState) -> dict[str, Any]:
     # 上传最终视频
     final_video_path = state.get('final_video', '')
     if final_video_path and os.path.exists(final_video_path):
-        oss_result = upload_to_oss(final_video_path, oss_config)
+        oss_result = await asyncio.to_thread(upload_to_oss, final_video_path, oss_config)
         result.update(oss_result)
         
         # 更新OSS上传状态
@@ -157,18 +193,22 @@ def post_processing_node(state: VideoGenerationState) -> dict[str, Any]:
     
     try:
         # 创建视频数据库记录
+        video_status = "completed" if result.get('oss_url') else "failed"
         video = Video(
             user_id=user_id,
             video_url=result.get('oss_url'),
-            status="completed" if result.get('oss_url') else "failed"
+            status=video_status
         )
         db.session.add(video)
+        # 先 flush 取得自增ID，避免提交后实例过期导致再次查询数据库
+        db.session.flush()
+        video_db_id = video.id
         db.session.commit()
         
         # 更新状态中的数据库记录信息
         result.update({
-            "video_db_id": video.id,
-            "video_status": video.status
+            "video_db_id": video_db_id,
+            "video_status": video_status
         })
         
     except Exception as e:
@@ -180,9 +220,10 @@ def post_processing_node(state: VideoGenerationState) -> dict[str, Any]:
             "video_status": "failed"
         })
     
-    # 清理源文件
-    if os.path.exists(state['root_dir']):
-       cleanup_files(state['root_dir'])
+    # 清理源文件：放到后台线程执行，不阻塞工作流返回（目录不存在时 cleanup_files 直接返回）
+    task = asyncio.create_task(asyncio.to_thread(cleanup_files, state['root_dir']))
+    _background_tasks.add(task)
+    task.add_done_callback(_report_cleanup)
 
     # 更新当前步骤
     result["current_step"] = "post_processing"
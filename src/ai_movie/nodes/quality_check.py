@@ -1,9 +1,19 @@
+import asyncio
+import json
 import os
 from typing import Any
 
-from dashscope import MultiModalConversation
-
 from .state import VideoGenerationState
+from ai_movie.core import json_utils
+
+# 固定的系统消息和质检提示词，只构建一次
+_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": [
+        {"text": "You are a helpful assistant and a video quality expert."}
+    ],
+}
+_QUALITY_PROMPT = '请分析这段视频的内容质量，包括：1. 镜头切换是否连贯？2. 内容是否合理？3. 整体质量如何？请以JSON格式返回结果，包含"quality_acceptable"字段（布尔值）和"reason"字段（字符串），例如：{"quality_acceptable": true, "reason": "视频质量良好，镜头切换连贯，内容合理。"}'
 
 
 async def quality_check_node(state: VideoGenerationState) -> dict[str, Any]:
@@ -15,14 +25,11 @@ async def quality_check_node(state: VideoGenerationState) -> dict[str, Any]:
         raise FileNotFoundError(f"Final video file not found: {final_video_path}")
 
     try:
+        from dashscope import MultiModalConversation
+
         video_path = f"file://{final_video_path}"
         messages = [
-            {
-                "role": "system",
-                "content": [
-                    {"text": "You are a helpful assistant and a video quality expert."}
-                ],
-            },
+            _SYSTEM_MESSAGE,
             {
                 "role": "user",
                 "content": [
@@ -30,14 +37,14 @@ async def quality_check_node(state: VideoGenerationState) -> dict[str, Any]:
                         "video": video_path,
                         "fps": 2,  # Extract 2 frames per second for analysis
                     },
-                    {
-                        "text": '请分析这段视频的内容质量，包括：1. 镜头切换是否连贯？2. 内容是否合理？3. 整体质量如何？请以JSON格式返回结果，包含"quality_acceptable"字段（布尔值）和"reason"字段（字符串），例如：{"quality_acceptable": true, "reason": "视频质量良好，镜头切换连贯，内容合理。"}'
-                    },
+                    {"text": _QUALITY_PROMPT},
                 ],
             },
         ]
 
-        response = MultiModalConversation.call(
+        # SDK 调用为同步阻塞请求，放到线程中执行
+        response = await asyncio.to_thread(
+            MultiModalConversation.call,
             api_key=os.getenv("DASHSCOPE_API_KEY"),
             model="qwen-vl-max-latest",
             messages=messages,
@@ -50,13 +57,9 @@ async def quality_check_node(state: VideoGenerationState) -> dict[str, Any]:
             print(f"Video quality analysis: {analysis_text}")
 
             try:
-                import json
-
-                json_start = analysis_text.find("{")
-                json_end = analysis_text.rfind("}") + 1
-                if json_start != -1 and json_end > json_start:
-                    json_str = analysis_text[json_start:json_end]
-                    analysis_result = json.loads(json_str)
+                json_str = json_utils.find_json_object(analysis_text)
+                if json_str is not None:
+                    analysis_result = json_utils.loads(json_str)
                 else:
                     analysis_result = {
                         "quality_acceptable": False,
@@ -15,9 +15,12 @@ class VideoGenerationState(TypedDict):
     copywriting: str
     root_dir: str | None
     storyboard: list[dict[str, str]]  # List of {dialogue, prompt}
+    dialogues: list[str]  # 各分镜台词，与 storyboard 一一对应
+    prompts: list[str]  # 各分镜画面提示词，与 storyboard 一一对应
     audio_files: list[str]
     subtitle_file: str
     video_segments: list[str]
+    media_durations: Annotated[dict[str, float], operator.or_]  # 媒体文件路径 -> 时长（秒），避免重复探测
     final_video: str
     quality_analysis: str | dict[str, Any]
     quality_acceptable: bool
@@ -1,38 +1,31 @@
+import asyncio
+import hashlib
 import json
 import os
 from typing import Any
 
-from openai import OpenAI
+import diskcache
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    AsyncOpenAI,
+    InternalServerError,
+    RateLimitError,
+)
 
 from .state import VideoGenerationState
+from ai_movie.core import json_utils
 from ai_movie.core.exceptions import APIException, DashScopeAPIException
 from ai_movie.core.logging_config import workflow_logger
-from ai_movie.core.config import config
+from ai_movie.core.config import get_config
+from ai_movie.core.disk_cache import get_disk_cache
+from ai_movie.core.llm_client import get_llm_client
 
-
-async def storyboard_generation_node(state: VideoGenerationState) -> dict[str, Any]:
-    workflow_logger.log_task_start("storyboard_generation", 
-                                  user_id=state.get("user_id"),
-                                  video_id=state.get("video_db_id"),
-                                  video_topic=state["video_topic"])
-
-    try:
-        # 使用配置管理的API密钥和配置
-        api_key = os.getenv("DASHSCOPE_API_KEY") or config.ai.dashscope_api_key
-        if not api_key:
-            raise DashScopeAPIException(
-                "DashScope API密钥未配置",
-                error_code="DASHSCOPE_API_KEY_MISSING"
-            )
-        
-        client = OpenAI(
-            api_key=api_key,
-            base_url=config.ai.dashscope_base_url,
-        )
-
-        prompt = f"""
+# 分镜提示词模板（主题前后两段），只在导入时构建一次
+_PROMPT_PREFIX = """
            你是一位「一镜到底」短视频导演+编剧。  
-           请根据主题「{state['video_topic']}」一次性产出：  
+           请根据主题「"""
+_PROMPT_SUFFIX = """」一次性产出：  
            1) 网感标题（≤18字，带悬念或数字）  
            2) 口播文案（≤200字，10-20字短句，节奏感）  
            3) 10 个以内分镜脚本，做到真正“一镜到底”无跳切。
@@ -57,67 +50,172 @@ async def storyboard_generation_node(state: VideoGenerationState) -> dict[str, A
               - 禁止出现“感受、震撼、高级”等抽象词。  
 
            输出 JSON（严禁多余字段，严禁注释）：
-           {{
+           {
              "title": "18字以内标题",
-             "cast": {{ "物种":"","性别":"","年龄":"","服装":"","道具":"" }},
-             "scene": {{ "时间":"","地点":"","色调":"","天气":"" }},
+             "cast": { "物种":"","性别":"","年龄":"","服装":"","道具":"" },
+             "scene": { "时间":"","地点":"","色调":"","天气":"" },
              "mood": ["起","承","转","合","尾"],
              "storyboard":[
-                 {{
+                 {
                    "dialogue":"必须是15字左右的台词，口语",
                    "prompt":"镜头+动作+场景+光影，一行写完"
-                 }}
+                 }
              ]
-           }}
+           }
            """
 
-        completion = client.chat.completions.create(
-            model=config.ai.text_model,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "你是一个专业的视频人员，擅长将文案分解为具体的视频场景。请严格按照要求的JSON格式回复，不要包含其他内容。特别注意要控制每个场景的台词长度在20-30个字符以内。",
-                },
-                {"role": "user", "content": prompt},
-            ],
-            response_format={"type": "json_object"},
-            timeout=config.ai.api_timeout,
-        )
+# 提示词模板版本，修改模板后递增以使旧的分镜缓存失效
+_PROMPT_VERSION = 1
+# 分镜缓存条目的有效期（秒），过期后重新生成
+_CACHE_EXPIRE = 7 * 24 * 3600
+
+# 超时估算参数：基础秒数 + 每个提示词字符增加的秒数
+_TIMEOUT_BASE = 30.0
+_TIMEOUT_PER_CHAR = 0.01
+
+_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "你是一个专业的视频人员，擅长将文案分解为具体的视频场景。请严格按照要求的JSON格式回复，不要包含其他内容。特别注意要控制每个场景的台词长度在20-30个字符以内。",
+}
+
+
+def _cache_key(model: str, video_topic: str) -> str:
+    """分镜缓存键"""
+    return hashlib.sha256(f"{model}|{video_topic}|{_PROMPT_VERSION}".encode()).hexdigest()
 
-        response_text = completion.choices[0].message.content
-        if not response_text:
-            raise APIException(
-                "API返回内容为空",
-                error_code="EMPTY_API_RESPONSE"
+
+def _load_cached_storyboard(cache: diskcache.Cache, key: str) -> list | None:
+    """读取缓存的分镜，不存在、已过期或内容无效时返回None"""
+    storyboard = cache.get(key)
+    return storyboard if isinstance(storyboard, list) else None
+
+
+def _save_cached_storyboard(cache: diskcache.Cache, key: str, storyboard: list) -> None:
+    """写入分镜缓存，超过容量上限时由 diskcache 淘汰最久未使用的条目"""
+    try:
+        cache.set(key, storyboard, expire=_CACHE_EXPIRE)
+    except (OSError, diskcache.Timeout) as e:
+        workflow_logger.warning("分镜缓存写入失败", cache_key=key, error=str(e))
+
+
+async def _request_storyboard(client: AsyncOpenAI, model: str, prompt: str, timeout: float) -> str:
+    """发起一次分镜生成请求并拼接流式返回的内容（关闭客户端内置重试，超时、限流和服务端错误的重试由调用方控制）"""
+    completion = await client.with_options(max_retries=0).chat.completions.create(
+        model=model,
+        messages=[
+            _SYSTEM_MESSAGE,
+            {"role": "user", "content": prompt},
+        ],
+        response_format={"type": "json_object"},
+        timeout=timeout,
+        stream=True,
+    )
+
+    # 流式接收，边收边拼接，避免等待完整响应一次性返回
+    return "".join([
+        chunk.choices[0].delta.content or ""
+        async for chunk in completion
+        if chunk.choices
+    ])
+
+
+async def storyboard_generation_node(state: VideoGenerationState) -> dict[str, Any]:
+    workflow_logger.log_task_start("storyboard_generation", 
+                                  user_id=state.get("user_id"),
+                                  video_id=state.get("video_db_id"),
+                                  video_topic=state["video_topic"])
+
+    try:
+        config = get_config()
+        # 使用配置管理的API密钥和配置
+        api_key = os.getenv("DASHSCOPE_API_KEY") or config.ai.dashscope_api_key
+        if not api_key:
+            raise DashScopeAPIException(
+                "DashScope API密钥未配置",
+                error_code="DASHSCOPE_API_KEY_MISSING"
             )
         
-        response_data = json.loads(response_text)
+        # 相同模型+主题+提示词版本的分镜结果缓存到磁盘，重复生成时直接读取
+        cache = (
+            get_disk_cache("storyboard", config.ai.storyboard_cache_size_mb)
+            if config.ai.storyboard_cache_enabled else None
+        )
+        cache_key = _cache_key(config.ai.text_model, state["video_topic"])
+        storyboard = _load_cached_storyboard(cache, cache_key) if cache is not None else None
+        if storyboard is not None:
+            workflow_logger.info("命中分镜缓存",
+                                 user_id=state.get("user_id"),
+                                 video_id=state.get("video_db_id"),
+                                 cache_key=cache_key)
+        else:
+            client = get_llm_client()
+
+            prompt = f"{_PROMPT_PREFIX}{state['video_topic']}{_PROMPT_SUFFIX}"
+
+            # 自适应超时：按提示词长度估算，超时后加倍重试，不超过配置的 api_timeout
+            timeout_s = min(config.ai.api_timeout, _TIMEOUT_BASE + len(prompt) * _TIMEOUT_PER_CHAR)
+            attempts = max(config.ai.api_retry_count, 1)
+            for attempt in range(attempts):
+                try:
+                    response_text = await _request_storyboard(client, config.ai.text_model, prompt, timeout_s)
+                    break
+                except APITimeoutError:
+                    if attempt + 1 >= attempts:
+                        raise
+                    workflow_logger.warning("分镜生成请求超时，延长超时时间重试",
+                                           user_id=state.get("user_id"),
+                                           video_id=state.get("video_db_id"),
+                                           timeout=timeout_s)
+                    timeout_s = min(timeout_s * 2, config.ai.api_timeout)
+                except (RateLimitError, APIConnectionError, InternalServerError) as e:
+                    # 限流、连接错误和服务端错误按指数退避重试（替代客户端内置的重试）
+                    if attempt + 1 >= attempts:
+                        raise
+                    delay = config.ai.api_retry_delay * 2 ** attempt
+                    workflow_logger.warning("分镜生成请求失败，稍后重试",
+                                           user_id=state.get("user_id"),
+                                           video_id=state.get("video_db_id"),
+                                           error=str(e),
+                                           retry_delay=delay)
+                    await asyncio.sleep(delay)
+            if not response_text:
+                raise APIException(
+                    "API返回内容为空",
+                    error_code="EMPTY_API_RESPONSE"
+                )
+        
+            response_data = json_utils.loads(response_text)
 
-        storyboard = response_data.get("storyboard", [])
+            storyboard = response_data.get("storyboard", [])
 
-        if not isinstance(storyboard, list):
-            workflow_logger.warning("分镜结果不是列表，使用备用方案",
-                                   user_id=state.get("user_id"),
-                                   video_id=state.get("video_db_id"))
+            if not isinstance(storyboard, list):
+                workflow_logger.warning("分镜结果不是列表，使用备用方案",
+                                       user_id=state.get("user_id"),
+                                       video_id=state.get("video_db_id"))
             
-            segments = state["copywriting"].split(".")[:5]  # Take first 5 sentences
-            storyboard = []
-            for i, segment in enumerate(segments):
-                if segment.strip():
-                    # Truncate dialogue to ~30 characters for 5-second audio
-                    truncated_dialogue = segment.strip()
-                    if len(truncated_dialogue) > 30:
-                        truncated_dialogue = truncated_dialogue[:30] + "..."
-                    storyboard.append(
-                        {
-                            "dialogue": truncated_dialogue,
-                            "prompt": f"High-quality video scene {i + 1} related to: {segment.strip()}",
-                        }
-                    )
-        else:
-            for scene in storyboard:
-                if "dialogue" in scene and len(scene["dialogue"]) > 30:
-                    scene["dialogue"] = scene["dialogue"][:30] + "..."
+                segments = state["copywriting"].split(".")[:5]  # Take first 5 sentences
+                storyboard = []
+                for i, segment in enumerate(segments):
+                    if segment.strip():
+                        # Truncate dialogue to ~30 characters for 5-second audio
+                        truncated_dialogue = segment.strip()
+                        if len(truncated_dialogue) > 30:
+                            truncated_dialogue = truncated_dialogue[:30] + "..."
+                        storyboard.append(
+                            {
+                                "dialogue": truncated_dialogue,
+                                "prompt": f"High-quality video scene {i + 1} related to: {segment.strip()}",
+                            }
+                        )
+            else:
+                # 单次遍历截断过长台词，其余分镜原样保留
+                storyboard = [
+                    {**scene, "dialogue": scene["dialogue"][:30] + "..."}
+                    if len(scene.get("dialogue", "")) > 30 else scene
+                    for scene in storyboard
+                ]
+                if cache is not None:
+                    _save_cached_storyboard(cache, cache_key, storyboard)
         
         workflow_logger.log_task_end("storyboard_generation", 
                                     success=True,
@@ -125,7 +223,12 @@ async def storyboard_generation_node(state: VideoGenerationState) -> dict[str, A
                                     video_id=state.get("video_db_id"),
                                     storyboard_count=len(storyboard))
         
-        return {"storyboard": storyboard}
+        # 同时按字段拆成并列数组，下游只需遍历所需字段
+        return {
+            "storyboard": storyboard,
+            "dialogues": [scene.get("dialogue", "") for scene in storyboard],
+            "prompts": [scene.get("prompt", "") for scene in storyboard],
+        }
 
     except json.JSONDecodeError as e:
         workflow_logger.error("JSON解析失败", 
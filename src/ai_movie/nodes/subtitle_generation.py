@@ -1,10 +1,46 @@
+import os
 from typing import Any
 
 from .state import VideoGenerationState
 
+# 标题转文件名：空格及文件系统不允许的字符统一替换为下划线
+_SLUG_TABLE = str.maketrans({ch: '_' for ch in ' /\\:*?"<>|\0'})
+
+# 没有记录片段时长时，按单个分镜视频的默认时长（秒）计算
+_DEFAULT_SCENE_DURATION = 5.0
+
+
+def _srt_time(seconds: float) -> str:
+    """秒数转为SRT时间格式 HH:MM:SS,mmm"""
+    millis = round(seconds * 1000)
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
 
 async def subtitle_generation_node(state: VideoGenerationState) -> dict[str, Any]:
     print("Executing: Subtitle generation node")
-    subtitle_file = f"subtitles_for_{state['title'].replace(' ', '_')}.srt"
+    subtitle_file = os.path.join(
+        state.get("root_dir") or ".",
+        f"subtitles_for_{state['title'].translate(_SLUG_TABLE)}.srt",
+    )
+
+    # 直接用分镜台词和已记录的片段时长生成字幕，无需再调用模型或ffmpeg
+    dialogues = state.get("dialogues") or [scene.get("dialogue", "") for scene in state.get("storyboard", [])]
+    video_segments = state.get("video_segments") or []
+    durations = state.get("media_durations") or {}
+
+    entries = []
+    start = 0.0
+    for i, dialogue in enumerate(dialogues):
+        segment = video_segments[i] if i < len(video_segments) else None
+        end = start + durations.get(segment, _DEFAULT_SCENE_DURATION)
+        if dialogue:
+            entries.append(f"{len(entries) + 1}\n{_srt_time(start)} --> {_srt_time(end)}\n{dialogue}\n\n")
+        start = end
+
+    with open(subtitle_file, "w", encoding="utf-8") as f:
+        f.write("".join(entries))
 
     return {"subtitle_file": subtitle_file}
@@ -1,4 +1,6 @@
+import asyncio
 import os
+import shutil
 from typing import Any
 
 import ffmpeg
@@ -6,104 +8,113 @@ import ffmpeg
 from .state import VideoGenerationState
 
 
-def get_media_duration(file_path: str) -> float:
+# concat demuxer 报错信息中表示片段编码参数或时间戳不一致的关键字（小写）
+_REENCODE_HINTS = ("codec", "timestamp", "dts", "pts", "parameters", "mismatch")
+
+
+async def _run_ffmpeg(*args: str) -> tuple[int, bytes]:
+    """运行ffmpeg命令，返回 (退出码, stderr输出)"""
+    proc = await asyncio.create_subprocess_exec(
+        "ffmpeg", *args,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    _, stderr = await proc.communicate()
+    return proc.returncode, stderr
+
+
+def _needs_reencode(error_text: str) -> bool:
+    """根据ffmpeg错误输出判断是否需要重新编码拼接"""
+    error_text = error_text.lower()
+    return any(hint in error_text for hint in _REENCODE_HINTS)
+
+
+async def probe_duration_async(file_path: str) -> float:
     """
-    获取媒体文件的时长（秒）
+    异步获取媒体文件时长（秒），便于多个文件并发探测
     
     Args:
         file_path: 媒体文件路径
         
     Returns:
-        文件时长（秒）
+        文件时长（秒），获取失败时返回0.0
     """
     try:
-        probe = ffmpeg.probe(file_path)
-        duration = float(probe['format']['duration'])
-        return duration
-    except Exception as e:
-        print(f"Error getting duration for {file_path}: {e}")
-        # 尝试从streams获取时长
-        try:
-            probe = ffmpeg.probe(file_path)
-            duration = float(probe['streams'][0]['duration'])
-            return duration
-        except Exception as e2:
-            print(f"Error getting duration from streams for {file_path}: {e2}")
+        proc = await asyncio.create_subprocess_exec(
+            "ffprobe", "-v", "error",
+            "-show_entries", "format=duration",
+            "-of", "default=nw=1:nk=1",
+            file_path,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stdout, stderr = await proc.communicate()
+        if proc.returncode != 0:
+            print(f"Error getting duration for {file_path}: {stderr.decode(errors='replace').strip()}")
             return 0.0
+        return float(stdout.strip() or 0)
+    except (OSError, ValueError) as e:
+        print(f"Error getting duration for {file_path}: {e}")
+        return 0.0
 
 
-def adjust_audio_length(audio_path: str, video_path: str, output_path: str) -> str:
+async def merge_segment(idx: int, v_path: str, a_path: str, output_dir: str,
+                        video_duration: float | None = None,
+                        audio_duration: float | None = None) -> str:
     """
-    调整音频长度以匹配视频长度（通过截断或填充静音）
+    将单个视频片段与对应音频合并
     
     Args:
-        audio_path: 音频文件路径
-        video_path: 视频文件路径
-        output_path: 输出文件路径
+        idx: 片段序号
+        v_path: 视频文件路径
+        a_path: 音频文件路径
+        output_dir: 输出目录
+        video_duration: 预先探测的视频时长，为None时在此探测
+        audio_duration: 已知的音频时长，为None时总是补静音
         
     Returns:
-        调整后的音频文件路径
+        合并后的片段路径，失败时返回原视频路径（调用方需确保两个输入文件存在）
     """
-    try:
-        # 获取视频时长
-        video_duration = get_media_duration(video_path)
-        if video_duration <= 0:
-            print(f"Could not get video duration for {video_path}")
-            return audio_path
-            
-        # 获取音频时长
-        audio_duration = get_media_duration(audio_path)
-        if audio_duration <= 0:
-            print(f"Could not get audio duration for {audio_path}")
-            return audio_path
-            
-        # 如果音频和视频时长相同（误差在100毫秒内），直接返回原音频
-        if abs(video_duration - audio_duration) < 0.1:
-            return audio_path
-            
-        # 使用ffmpeg处理音频长度
-        audio_input = ffmpeg.input(audio_path)
-        
-        if audio_duration > video_duration:
-            # 音频过长，需要截断
-            adjusted_audio = ffmpeg.filter(audio_input, 'atrim', duration=video_duration)
-            print(f"Truncated audio {audio_path} from {audio_duration:.2f}s to {video_duration:.2f}s")
-        else:
-            # 音频过短，需要填充静音
-            # 创建静音音频流
-            silence = ffmpeg.input("anullsrc=channel_layout=stereo:sample_rate=44100", f="lavfi")
-            # 截取所需长度的静音
-            silence_clip = ffmpeg.filter(silence, 'atrim', duration=video_duration - audio_duration)
-            # 连接原音频和静音
-            adjusted_audio = ffmpeg.filter([audio_input, silence_clip], 'concat', v=0, a=1)
-            print(f"Padded audio {audio_path} from {audio_duration:.2f}s to {video_duration:.2f}s with silence")
-        
-        # 输出调整后的音频
-        output = ffmpeg.output(
-            adjusted_audio,
-            output_path,
-            acodec='libmp3lame',  # 使用MP3编码器
-            audio_bitrate='128k'
-        )
-            
-        output.overwrite_output().run(capture_stdout=True, capture_stderr=True)
-        return output_path
-        
-    except ffmpeg.Error as e:
-        print(f"FFmpeg error adjusting audio length: {e}")
-        if e.stderr:
-            print(e.stderr.decode())
-        return audio_path
-    except Exception as e:
-        print(f"Error adjusting audio length: {e}")
-        return audio_path
+    # 一次ffmpeg完成音频长度调整与合并：音频用apad补静音，再按视频时长截断，无需中间音频文件
+    if video_duration is None:
+        video_duration = await probe_duration_async(v_path)
+    # 直接输出为MPEG-TS片段，concat demuxer拼接TS时对时间基等差异更宽容，可稳定流复制
+    out_path = os.path.join(output_dir, f"{idx}.ts")
+    video_input = ffmpeg.input(v_path)
+    audio = ffmpeg.input(a_path).audio
+    # 已知音频不短于视频时只需按视频时长截断，省去apad滤镜
+    if not (video_duration > 0 and audio_duration is not None and audio_duration >= video_duration):
+        audio = audio.filter('apad')
+    # 取不到视频时长时退回按最短流截断
+    length_opts = {"t": video_duration} if video_duration > 0 else {"shortest": None}
+
+    output = ffmpeg.output(
+        video_input.video,
+        audio,
+        out_path,
+        vcodec="copy",  # 视频不需要重新编码
+        acodec="aac",
+        avoid_negative_ts="make_zero",
+        format="mpegts",
+        **{"bsf:v": "h264_mp4toannexb"},
+        **length_opts,
+    )
+
+    returncode, stderr = await _run_ffmpeg(*output.overwrite_output().get_args())
+    if returncode != 0:
+        print(f"Merge failed for segment {idx}")
+        print(stderr.decode(errors="replace"))
+        return v_path  # fallback
+    print(f"Merged segment {idx}")
+    return out_path
 
 
 async def video_concatenation_node(state: VideoGenerationState) -> dict[str, Any]:
     print("Executing: Video concatenation node")
 
     root_dir: str = state["root_dir"]
-    video_and_audio_dir = os.path.join(root_dir, "video_and_audio")
+    # 输出目录一次转为绝对路径，合并生成的片段路径随之都是绝对路径
+    video_and_audio_dir = os.path.abspath(os.path.join(root_dir, "video_and_audio"))
     os.makedirs(video_and_audio_dir, exist_ok=True)
 
     final_video = os.path.join(root_dir, "final_video.mp4")
@@ -122,96 +133,93 @@ async def video_concatenation_node(state: VideoGenerationState) -> dict[str, Any
 
     merged_segments: list[str] = []
 
+    # 每个输入文件只stat一次，后续存在性判断都查这张表
+    existing = {path: os.path.isfile(path) for path in {*video_segments, *audio_segments} if path}
+
     # 只有当两个列表都非空时才进行音视频合并
     if video_segments and audio_segments:
-        for idx, (v_path, a_path) in enumerate(zip(video_segments, audio_segments)):
-            if not (os.path.isfile(v_path) and os.path.isfile(a_path)):
+        pairs = list(zip(video_segments, audio_segments))
+        # 优先使用上游节点已记录的时长，其余片段并发探测，合并时不再逐个串行调用ffprobe
+        known_durations = state.get("media_durations") or {}
+
+        async def _duration(v_path: str) -> float:
+            if v_path in known_durations:
+                return known_durations[v_path]
+            return await probe_duration_async(v_path) if existing.get(v_path) else 0.0
+
+        durations = await asyncio.gather(*(_duration(v_path) for v_path, _ in pairs))
+
+        # 各片段相互独立，并发处理；限制并发数避免同时启动过多ffmpeg进程
+        semaphore = asyncio.Semaphore(os.cpu_count() or 1)
+
+        async def _process(idx: int, v_path: str, a_path: str, duration: float) -> str:
+            if not (existing.get(v_path) and existing.get(a_path)):
                 print(f"Skip missing pair: {v_path} + {a_path}")
-                merged_segments.append(v_path)
-                continue
-
-            # 调整音频长度以匹配视频长度
-            adjusted_audio_path = os.path.join(video_and_audio_dir, f"adjusted_{idx}.mp3")  # 确保使用.mp3扩展名
-            adjusted_audio = adjust_audio_length(a_path, v_path, adjusted_audio_path)
-            
-            # 合并视频和调整后的音频
-            out_path = os.path.join(video_and_audio_dir, f"{idx}.mp4")
-            try:
-                video_input = ffmpeg.input(v_path)
-                audio_input = ffmpeg.input(adjusted_audio)
-
-                output = ffmpeg.output(
-                    video_input,
-                    audio_input,
-                    out_path,
-                    vcodec="copy",  # 视频不需要重新编码
-                    acodec="aac",
-                    shortest=None,  # 不使用shortest参数，因为我们已经调整了音频长度
-                    avoid_negative_ts="make_zero",
-                )
-
-                output.overwrite_output().run(capture_stdout=True, capture_stderr=True)
-                merged_segments.append(out_path)
-                print(f"Merged segment {idx}")
-                
-                # 清理临时调整的音频文件（如果不是原始音频文件）
-                if adjusted_audio != a_path and os.path.exists(adjusted_audio) and adjusted_audio == adjusted_audio_path:
-                    try:
-                        os.remove(adjusted_audio)
-                    except Exception as e:
-                        print(f"Warning: Could not remove temporary file {adjusted_audio}: {e}")
-            except ffmpeg.Error as e:
-                print(f"Merge failed for segment {idx}: {e}")
-                if e.stderr:
-                    print(e.stderr.decode())
-                merged_segments.append(v_path)  # fallback
+                return v_path
+            async with semaphore:
+                return await merge_segment(idx, v_path, a_path, video_and_audio_dir, duration,
+                                           known_durations.get(a_path))
+
+        merged_segments = [
+            seg for seg in await asyncio.gather(
+                *(_process(idx, v_path, a_path, duration)
+                  for idx, ((v_path, a_path), duration) in enumerate(zip(pairs, durations)))
+            )
+            if seg
+        ]
     else:
         # 如果没有音频文件，则直接使用视频文件
         print("No audio files provided, using video segments directly")
-        merged_segments = [v for v in video_segments if v and os.path.isfile(v)]
+        merged_segments = [v for v in video_segments if existing.get(v)]
     
     if not merged_segments:
         print("No segments to concatenate")
         return {"final_video": ""}
 
     concat_list_path = os.path.join(video_and_audio_dir, "concat_list.txt")
+    # 一次性拼好内容后单次写入；只取一次当前目录，绝对路径在join时保持不变
+    cwd = os.getcwd()
+    payload = "".join(f"file '{os.path.join(cwd, seg)}'\n" for seg in merged_segments)
     with open(concat_list_path, "w") as f:
-        for seg in merged_segments:
-            abs_seg = os.path.abspath(seg)
-            f.write(f"file '{abs_seg}'\n")
-
-    try:
-        (
-            ffmpeg.input(concat_list_path, format="concat", safe=0)
-            .output(final_video, c="copy", avoid_negative_ts="make_zero")
-            .overwrite_output()
-            .run(capture_stdout=True, capture_stderr=True)
-        )
+        f.write(payload)
+
+    # 直接调用ffmpeg的concat demuxer做流复制拼接
+    returncode, stderr = await _run_ffmpeg(
+        "-y", "-f", "concat", "-safe", "0", "-i", concat_list_path,
+        "-c", "copy", "-avoid_negative_ts", "make_zero", final_video,
+    )
+    if returncode == 0:
         print("🎉 Concatenated with concat demuxer")
-    except ffmpeg.Error as e:
-        print("Concat demuxer failed, trying concat filter…", e)
-        try:
-            inputs = [ffmpeg.input(s) for s in merged_segments if s]
-            if inputs:
-                joined = ffmpeg.concat(*inputs, v=1, a=1).node
-                (
-                    ffmpeg.output(
-                        joined[0], joined[1], final_video, vcodec="libx264", acodec="aac"
-                    )
-                    .overwrite_output()
-                    .run(capture_stdout=True, capture_stderr=True)
-                )
-                print("🎉 Concatenated with concat filter")
-            else:
-                print("No valid inputs for concatenation")
-                return {"final_video": ""}
-        except ffmpeg.Error as e2:
-            print("All concatenation failed, copying first segment:", e2)
-            if merged_segments and merged_segments[0] and os.path.isfile(merged_segments[0]):
-                import shutil
-                shutil.copy2(merged_segments[0], final_video)
-            else:
-                print("No valid segment to copy")
-                return {"final_video": ""}
+        return {"final_video": final_video, "root_dir": root_dir}
+
+    error_text = stderr.decode(errors="replace")
+    print("Concat demuxer failed:", error_text[-500:])
+
+    # 仅在编码参数/时间戳不一致时才退回到重新编码的concat filter
+    if _needs_reencode(error_text):
+        print("Trying concat filter…")
+        inputs = [ffmpeg.input(s) for s in merged_segments if s]
+        if not inputs:
+            print("No valid inputs for concatenation")
+            return {"final_video": ""}
+        joined = ffmpeg.concat(*inputs, v=1, a=1).node
+        output = ffmpeg.output(
+            joined[0], joined[1], final_video, vcodec="libx264", acodec="aac"
+        ).overwrite_output()
+        returncode, stderr = await _run_ffmpeg(*output.get_args())
+        if returncode == 0:
+            print("🎉 Concatenated with concat filter")
+            return {"final_video": final_video, "root_dir": root_dir}
+        print("Concat filter failed:", stderr.decode(errors="replace")[-500:])
+
+    print("All concatenation failed, copying first segment")
+    if merged_segments and merged_segments[0] and os.path.isfile(merged_segments[0]):
+        # 片段可能是TS，先尝试转封装为MP4，失败再直接复制
+        returncode, _ = await _run_ffmpeg("-y", "-i", merged_segments[0], "-c", "copy", final_video)
+        if returncode != 0:
+            shutil.copy2(merged_segments[0], final_video)
+    else:
+        print("No valid segment to copy")
+        return {"final_video": ""}
 
     return {"final_video": final_video, "root_dir": root_dir}
\ No newline at end of file
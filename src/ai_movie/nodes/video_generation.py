@@ -1,17 +1,46 @@
-import base64
+import asyncio
+import functools
+import hashlib
 import mimetypes
+import mmap
 import os
 import ssl
+import threading
+import time
 from http import HTTPStatus
 from typing import Any
 
 import cv2  # 请确保已 pip install opencv-python
+import httpx
 from dashscope import MultiModalConversation, VideoSynthesis
 
 from .state import VideoGenerationState
+from .video_concatenation import probe_duration_async
 from ai_movie.core.exceptions import APIException, DashScopeAPIException, VideoProcessingException
 from ai_movie.core.logging_config import video_logger
-from ai_movie.core.config import config
+from ai_movie.core.config import get_config
+from ai_movie.utils.oss import upload_bytes_to_oss
+
+try:
+    # SIMD加速的base64实现，直接输出str，省去中间的bytes对象和decode
+    from pybase64 import b64encode_as_string as _b64encode_str
+except ImportError:  # pragma: no cover - pybase64 为可选依赖
+    import base64
+
+    def _b64encode_str(data) -> str:
+        return base64.b64encode(data).decode('ascii')
+
+try:
+    from PIL import Image  # 仅读取文件头获取尺寸，无需解码像素
+except ImportError:  # pragma: no cover - Pillow 为可选依赖
+    Image = None
+
+# 启用OpenCV的SIMD优化，缩放时多线程并行
+cv2.setUseOptimized(True)
+cv2.setNumThreads(min(8, os.cpu_count() or 1))
+
+# 下载视频用的SSL上下文，进程内只构建一次（加载CA证书开销较大）
+_DOWNLOAD_SSL_CONTEXT = ssl.create_default_context()
 
 # Image size requirements for DashScope API
 MIN_HEIGHT = 512
@@ -19,121 +48,251 @@ MAX_HEIGHT = 4096
 MIN_WIDTH = 512
 MAX_WIDTH = 4096
 
+# 小于该大小的文件直接读取，mmap 的建立开销在小文件上得不偿失
+_MMAP_THRESHOLD = 64 * 1024
+
+
+def _b64encode_file(file_path: str) -> str:
+    """base64编码文件内容；大文件通过mmap读取，避免再复制一份完整的bytes"""
+    with open(file_path, 'rb') as image_file:
+        if os.fstat(image_file.fileno()).st_size < _MMAP_THRESHOLD:
+            return _b64encode_str(image_file.read())
+        with mmap.mmap(image_file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return _b64encode_str(mm)
+
+
 def encode_file(file_path):
     """Encode file to base64"""
     mime_type, _ = mimetypes.guess_type(file_path)
     if not mime_type or not mime_type.startswith('image/'):
         raise ValueError('Unsupported or unrecognized image format')
-    with open(file_path, 'rb') as image_file:
-        encoded_string = base64.b64encode(image_file.read()).decode('utf-8')
+    encoded_string = _b64encode_file(file_path)
     return f'data:{mime_type};base64,{encoded_string}'
 
 
-def encode_and_resize_file(file_path: str, video_dir: str, filename: str = "resized_image.jpg") -> str | None:
+def encode_and_resize_file(file_path: str) -> str | None:
     """
     Encode file to base64 after resizing it to meet API requirements.
     
     Args:
         file_path: Path to the input image file
-        video_dir: Directory to save the resized image
-        filename: Name for the resized image file
         
     Returns:
         Base64 encoded string of the resized image, or None if failed
     """
     try:
-        # Create path for resized image
-        resized_image_path = os.path.join(video_dir, filename)
-        
-        # Resize the image
-        if not resize_image_for_api(file_path, resized_image_path):
-            print(f"Failed to resize image: {file_path}")
+        # Resize the image in memory
+        resized = resize_image_to_bytes(file_path)
+        if resized is None:
+            video_logger.warning("Failed to resize image", image_path=file_path)
             return None
         
         # Encode the resized image
-        mime_type, _ = mimetypes.guess_type(resized_image_path)
-        if not mime_type or not mime_type.startswith('image/'):
-            print(f'Unsupported or unrecognized image format: {resized_image_path}')
-            return None
-        
-        with open(resized_image_path, 'rb') as image_file:
-            encoded_string = base64.b64encode(image_file.read()).decode('utf-8')
-        return f'data:{mime_type};base64,{encoded_string}'
+        return _to_data_uri(*resized)
     except Exception as e:
-        print(f"Error encoding and resizing file: {e}")
+        video_logger.error("Error encoding and resizing file", image_path=file_path, error=e)
         return None
 
 
-def resize_image_for_api(image_path: str, output_path: str) -> bool:
+def _to_data_uri(data: bytes, mime_type: str) -> str:
+    """将图片数据编码为base64 data URI"""
+    encoded_string = _b64encode_str(data)
+    return f'data:{mime_type};base64,{encoded_string}'
+
+
+# 上传图片的签名URL有效期（秒）；bucket默认私有，未签名的地址会被拒绝访问
+_IMAGE_URL_TTL = 3600
+# 缓存的签名URL剩余有效期不足该秒数时重新上传，保证视频合成任务执行期间仍可访问
+_IMAGE_URL_MIN_REMAINING = _IMAGE_URL_TTL // 2
+
+# 缩放后图片内容哈希 -> (签名URL, 过期时间)，相同图片不再重复上传
+# 各场景在 to_thread 工作线程中并发准备图片，读写都需持有 _uploaded_image_urls_lock
+_uploaded_image_urls: dict[str, tuple[str, float]] = {}
+_uploaded_image_urls_lock = threading.Lock()
+_UPLOADED_IMAGE_URLS_MAXSIZE = 256
+
+
+def prepare_image_url(file_path: str) -> str | None:
     """
-    Resize an image to meet DashScope API requirements.
-    Height and width should be between 512 and 4096 pixels.
+    Resize an image and return a URL usable as the img_url of video synthesis.
+    
+    配置了OSS时直接上传内存中的缩放结果并返回带签名的OSS地址（私有bucket也可访问），
+    避免把整张图片以base64内嵌到请求中；未配置OSS或上传失败时回退为base64 data URI。
     
     Args:
-        image_path: Path to the input image
-        output_path: Path to save the resized image
+        file_path: Path to the input image file
         
     Returns:
-        True if resizing was successful, False otherwise
+        Signed OSS URL or data URI of the resized image, or None if failed
     """
+    oss_config = get_config().oss
+    if not all((oss_config.access_key_id, oss_config.access_key_secret,
+                oss_config.endpoint, oss_config.bucket)):
+        return encode_and_resize_file(file_path)
+    
     try:
-        # Read the image
-        image = cv2.imread(image_path)
-        if image is None:
-            print(f"Failed to read image: {image_path}")
-            return False
-        
-        height, width = image.shape[:2]
-        print(f"Original image size: {width}x{height}")
-        
-        # Check if resizing is needed
-        if (MIN_HEIGHT <= height <= MAX_HEIGHT and MIN_WIDTH <= width <= MAX_WIDTH and
-            height >= MIN_HEIGHT and width >= MIN_WIDTH):
-            # Image is already within acceptable range
-            # Just copy it to the output path
-            cv2.imwrite(output_path, image)
-            return True
-        
-        # Calculate new dimensions
-        # We want to maintain aspect ratio
-        scale_factor = 1.0
+        resized = resize_image_to_bytes(file_path)
+        if resized is None:
+            video_logger.warning("Failed to resize image", image_path=file_path)
+            return None
         
-        # If image is too small, scale up
-        if height < MIN_HEIGHT or width < MIN_WIDTH:
-            scale_factor = max(MIN_HEIGHT / height, MIN_WIDTH / width)
+        data, mime_type = resized
+        content_hash = hashlib.blake2b(data, digest_size=16).hexdigest()
         
-        # If image is too large, scale down
-        elif height > MAX_HEIGHT or width > MAX_WIDTH:
-            scale_factor = min(MAX_HEIGHT / height, MAX_WIDTH / width)
+        now = time.time()
+        with _uploaded_image_urls_lock:
+            cached = _uploaded_image_urls.get(content_hash)
+        if cached is not None and cached[1] - now >= _IMAGE_URL_MIN_REMAINING:
+            return cached[0]
         
-        new_width = int(width * scale_factor)
-        new_height = int(height * scale_factor)
+        extension = mimetypes.guess_extension(mime_type) or '.jpg'
+        result = upload_bytes_to_oss(
+            data,
+            f"{content_hash}{extension}",
+            {**oss_config.to_dict(), 'prefix': f"{oss_config.prefix}/images"},
+            url_expires=_IMAGE_URL_TTL,
+        )
+        image_url = result.get("oss_url")
+        if not image_url:
+            video_logger.warning("Failed to upload image to OSS, falling back to base64 data URI", error=result.get("error"))
+            return _to_data_uri(data, mime_type)
         
-        # Ensure dimensions are within bounds
-        new_width = max(MIN_WIDTH, min(MAX_WIDTH, new_width))
-        new_height = max(MIN_HEIGHT, min(MAX_HEIGHT, new_height))
+        with _uploaded_image_urls_lock:
+            if content_hash not in _uploaded_image_urls and len(_uploaded_image_urls) >= _UPLOADED_IMAGE_URLS_MAXSIZE:
+                _uploaded_image_urls.pop(next(iter(_uploaded_image_urls)))
+            _uploaded_image_urls[content_hash] = (image_url, now + _IMAGE_URL_TTL)
+        return image_url
+    except Exception as e:
+        video_logger.error("Error preparing image url", image_path=file_path, error=e)
+        return None
+
+
+# 缩放结果只作为视频模型的参考图，质量85即可，文件和编码耗时都明显小于默认的95
+_JPEG_WRITE_PARAMS = [
+    cv2.IMWRITE_JPEG_QUALITY, 85,
+    cv2.IMWRITE_JPEG_OPTIMIZE, 0,
+    cv2.IMWRITE_JPEG_PROGRESSIVE, 0,
+]
+
+# 尺寸合规时可以原样使用、无需重新编码的图片格式
+_PASSTHROUGH_MIME_TYPES = frozenset({'image/jpeg', 'image/png'})
+
+# 超大图片解码时直接按比例缩小（JPEG可跳过部分IDCT），缩小后长边仍不低于上限、短边仍不低于下限
+_REDUCED_IMREAD_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+def _imread_flag(width: int, height: int) -> int:
+    """根据原图尺寸选择 imread 的解码缩小倍数"""
+    longest, shortest = max(width, height), min(width, height)
+    for factor, flag in _REDUCED_IMREAD_FLAGS:
+        if longest >= MAX_WIDTH * factor and shortest >= MIN_WIDTH * factor:
+            return flag
+    return cv2.IMREAD_COLOR
+
+
+def resize_image_to_bytes(image_path: str) -> tuple[bytes, str] | None:
+    """
+    Resize an image to meet DashScope API requirements and return it in memory.
+    Height and width should be between 512 and 4096 pixels.
+    
+    Args:
+        image_path: Path to the input image
         
-        # Ensure dimensions are multiples of 64 (common requirement for AI models)
-        new_width = (new_width // 64) * 64
-        new_height = (new_height // 64) * 64
+    Returns:
+        (image bytes, MIME type) if successful, None otherwise
+    """
+    try:
+        st = os.stat(image_path)
+    except OSError as e:
+        video_logger.warning("Failed to read image", image_path=image_path, error=e)
+        return None
+    # 以 mtime_ns 和大小作为缓存键的一部分，源文件被修改后自动失效
+    return _resize_image(os.path.abspath(image_path), st.st_mtime_ns, st.st_size)
+
+
+@functools.lru_cache(maxsize=8)
+def _resize_image(image_path: str, mtime_ns: int, size: int) -> tuple[bytes, str] | None:
+    """缩放图片并在内存中编码，尺寸已合规时直接返回原文件内容；同一源图片的结果会被缓存"""
+    try:
+        image = None
+        if Image is not None:
+            with Image.open(image_path) as im:
+                width, height = im.size
+        else:
+            image = cv2.imread(image_path)
+            if image is None:
+                video_logger.warning("Failed to read image", image_path=image_path)
+                return None
+            height, width = image.shape[:2]
+        video_logger.debug("Original image size: %sx%s", width, height, image_path=image_path)
         
-        # Make sure we don't go below minimum after rounding
-        new_width = max(MIN_WIDTH, new_width)
-        new_height = max(MIN_HEIGHT, new_height)
+        # Check if resizing is needed
+        in_range = MIN_HEIGHT <= height <= MAX_HEIGHT and MIN_WIDTH <= width <= MAX_WIDTH
+        mime_type = mimetypes.guess_type(image_path)[0]
+        if in_range and mime_type in _PASSTHROUGH_MIME_TYPES:
+            # 尺寸合规且格式可直接使用时读取原文件，省去一次解码和重新编码
+            with open(image_path, 'rb') as image_file:
+                return image_file.read(), mime_type
         
-        print(f"Resizing image from {width}x{height} to {new_width}x{new_height}")
+        # 需要缩放或转换格式时才解码像素
+        if image is None:
+            image = cv2.imread(image_path, _imread_flag(width, height))
+            if image is None:
+                video_logger.warning("Failed to read image", image_path=image_path)
+                return None
+            # imread 会按EXIF方向旋转，且可能已按比例缩小解码，以解码后的尺寸为准
+            height, width = image.shape[:2]
         
-        # Resize the image
-        resized_image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_AREA)
+        if not in_range:
+            # Calculate new dimensions
+            # We want to maintain aspect ratio
+            scale_factor = 1.0
+            
+            # If image is too small, scale up
+            if height < MIN_HEIGHT or width < MIN_WIDTH:
+                scale_factor = max(MIN_HEIGHT / height, MIN_WIDTH / width)
+            
+            # If image is too large, scale down
+            elif height > MAX_HEIGHT or width > MAX_WIDTH:
+                scale_factor = min(MAX_HEIGHT / height, MAX_WIDTH / width)
+            
+            new_width = int(width * scale_factor)
+            new_height = int(height * scale_factor)
+            
+            # Ensure dimensions are within bounds
+            new_width = max(MIN_WIDTH, min(MAX_WIDTH, new_width))
+            new_height = max(MIN_HEIGHT, min(MAX_HEIGHT, new_height))
+            
+            # Ensure dimensions are multiples of 64 (common requirement for AI models)
+            new_width = (new_width // 64) * 64
+            new_height = (new_height // 64) * 64
+            
+            # Make sure we don't go below minimum after rounding
+            new_width = max(MIN_WIDTH, new_width)
+            new_height = max(MIN_HEIGHT, new_height)
+            
+            video_logger.debug("Resizing image from %sx%s to %sx%s", width, height, new_width, new_height,
+                               image_path=image_path)
+            
+            # Resize the image
+            # INTER_AREA 只适合缩小，放大时用 INTER_LINEAR
+            interpolation = cv2.INTER_LINEAR if scale_factor >= 1.0 else cv2.INTER_AREA
+            image = cv2.resize(image, (new_width, new_height), interpolation=interpolation)
         
-        # Save the resized image
-        cv2.imwrite(output_path, resized_image)
-        print(f"Resized image saved to: {output_path}")
-        return True
+        # Encode the image as JPEG in memory
+        ok, buffer = cv2.imencode('.jpg', image, _JPEG_WRITE_PARAMS)
+        if not ok:
+            video_logger.warning("Failed to encode image", image_path=image_path)
+            return None
+        return buffer.tobytes(), 'image/jpeg'
         
     except Exception as e:
-        print(f"Error resizing image: {e}")
-        return False
+        video_logger.error("Error resizing image", image_path=image_path, error=e)
+        return None
 
 
 def edit_image_with_qwen(prompt: str, base_image_url: str) -> str | None:
@@ -149,7 +308,7 @@ def edit_image_with_qwen(prompt: str, base_image_url: str) -> str | None:
     """
     api_key = os.getenv("DASHSCOPE_API_KEY")
     if not api_key:
-        print("DASHSCOPE_API_KEY not found in environment variables")
+        video_logger.error("DASHSCOPE_API_KEY not found in environment variables")
         return None
     
     messages = [
@@ -177,7 +336,7 @@ def edit_image_with_qwen(prompt: str, base_image_url: str) -> str | None:
             response = next(iter(response))
         
         if hasattr(response, 'status_code') and response.status_code == 200:
-            print("Image editing task completed successfully")
+            video_logger.info("Image editing task completed successfully")
             # Extract image URL using the known Qwen API response structure
             if (hasattr(response, 'output') and
                 hasattr(response.output, 'choices') and
@@ -189,18 +348,17 @@ def edit_image_with_qwen(prompt: str, base_image_url: str) -> str | None:
                 if isinstance(content, dict) and 'image' in content:
                     edited_image_url = content['image']
                     return edited_image_url
-            print("Failed to extract image URL from Qwen API response")
+            video_logger.warning("Failed to extract image URL from Qwen API response")
             return None
         else:
             status_code = getattr(response, 'status_code', 'unknown')
             code = getattr(response, 'code', 'unknown')
             message = getattr(response, 'message', 'unknown')
-            print(f"Failed to create image editing task. HTTP返回码：{status_code}")
-            print(f"错误码：{code}")
-            print(f"错误信息：{message}")
+            video_logger.warning("Failed to create image editing task",
+                                 status_code=status_code, code=code, error_message=message)
             return None
     except Exception as e:
-        print(f"Error creating image editing task: {e}")
+        video_logger.error("Error creating image editing task", error=e)
         return None
 
 
@@ -217,9 +375,11 @@ def generate_image_edit_prompt(previous_scene: dict, current_scene: dict) -> str
     Returns:
         A prompt for editing the image
     """
-    previous_prompt = previous_scene.get("prompt", "")
-    current_prompt = current_scene.get("prompt", "")
-    
+    return _transition_edit_prompt(previous_scene.get("prompt", ""), current_scene.get("prompt", ""))
+
+
+def _transition_edit_prompt(previous_prompt: str, current_prompt: str) -> str:
+    """根据前后两个场景的画面描述生成图片编辑提示词"""
     # Create a more descriptive prompt for the image editing API
     edit_prompt = f"Transform the image to transition from the scene described as '{previous_prompt}' to the scene described as '{current_prompt}'. Maintain visual consistency while adapting the content, characters, and setting to match the new scene description."
     return edit_prompt
@@ -237,113 +397,150 @@ async def video_generation_node(state: VideoGenerationState) -> dict[str, Any]:
     video_dir = os.path.join(state["root_dir"], "video_files")
     os.makedirs(video_dir, exist_ok=True)
 
-    video_segments = []
+    storyboard = state["storyboard"]
+    config = get_config()
+    # 视频合成任务并发上限，避免同时提交过多DashScope任务
+    semaphore = asyncio.Semaphore(max(config.ai.max_parallel_video_jobs, 1))
+    # 整个节点共享一个HTTP客户端，各场景下载复用keep-alive连接，不再逐个建立TLS
+    http_client = httpx.AsyncClient(
+        verify=_DOWNLOAD_SSL_CONTEXT,
+        timeout=httpx.Timeout(config.ai.api_timeout, connect=10.0),
+        limits=httpx.Limits(max_connections=16),
+        follow_redirects=True,
+    )
+
+    async def _download(url: str, path: str) -> None:
+        """流式下载视频到本地文件，按1MB分块在线程中写入，避免磁盘I/O阻塞事件循环"""
+        async with http_client.stream("GET", url) as response:
+            response.raise_for_status()
+            f = await asyncio.to_thread(open, path, "wb")
+            try:
+                async for chunk in response.aiter_bytes(1 << 20):
+                    await asyncio.to_thread(f.write, chunk)
+            finally:
+                await asyncio.to_thread(f.close)
+
+    async def _generate(i: int, prompt: str, img_url: str | None) -> tuple[str | None, float]:
+        """合成并下载单个场景视频，返回 (视频路径, 时长)，失败时路径为None"""
+        try:
+            async with semaphore:
+                if img_url:
+                    rsp = await asyncio.to_thread(
+                        VideoSynthesis.call,
+                        model="wan2.2-i2v-flash",
+                        prompt=prompt,
+                        img_url=img_url,
+                        resolution="480P"
+                    )
+                else:
+                    rsp = await asyncio.to_thread(
+                        VideoSynthesis.call,
+                        model="wan2.2-t2v-plus", prompt=prompt, size="832*480"
+                    )
+
+                if rsp.status_code != HTTPStatus.OK:
+                    video_logger.warning("Failed to generate video", scene_index=i,
+                                         status_code=rsp.status_code, code=rsp.code, error_message=rsp.message)
+                    return None, 0.0
+
+                video_url = rsp.output.video_url
+                video_logger.info("Video generated successfully", scene_index=i, video_url=video_url)
+
+                video_filename = f"{i}.mp4"
+                video_filepath = os.path.join(video_dir, video_filename)
+
+                await _download(video_url, video_filepath)
+                video_logger.info("Video downloaded", scene_index=i, video_path=video_filepath)
+
+            # 下载完成后立即探测时长，供合并节点直接使用
+            return video_filepath, await probe_duration_async(video_filepath)
+        except Exception as e:
+            video_logger.error("Error generating video", scene_index=i, error=e)
+            # Add a placeholder for failed video
+            return None, 0.0
+
+    # 优先使用分镜节点拆出的画面描述数组，直接调用节点时再从 storyboard 提取；
+    # 预先筛出有描述的场景，之后只处理这些场景
+    prompts = state.get("prompts") or [scene.get("prompt", "") for scene in storyboard]
+    scene_indices = [i for i, prompt in enumerate(prompts) if prompt]
+    for i, prompt in enumerate(prompts):
+        if not prompt:
+            video_logger.warning("No prompt found for scene", scene_index=i)
+
+    # 各场景的输入图片依赖上一场景编辑后的图片，图片链按顺序生成；
+    # 每个场景的输入确定后立即提交视频合成任务，与后续的图片编辑并行
+    tasks: dict[int, asyncio.Task] = {}
     previous_image_url = None  # Keep track of the previous scene's image
 
     try:
-        for i, scene in enumerate(state["storyboard"]):
-            prompt = scene.get("prompt", "")
-            if prompt:
-                try:
-                    video_logger.info(f"Generating video for scene {i + 1}/{len(state['storyboard'])}: {prompt[:50]}...",
-                                     user_id=state.get("user_id"),
-                                     video_id=state.get("video_db_id"),
-                                     scene_index=i)
-                    
-                    # For the first scene, use character image if provided and exists
-                    # For subsequent scenes, use image editing API
-                    if i == 0:
-                        # First scene - use user-provided image if available
-                        character_image_path = state.get("character_image_path")
-                        if character_image_path and isinstance(character_image_path, str) and os.path.exists(character_image_path):
-                            print(f"Using character image with image-to-video (wan2.2-i2v-flash) for scene {i + 1}")
-                            # Encode and resize the character image
-                            img_url = encode_and_resize_file(character_image_path, video_dir, f"resized_character_image_{i}.jpg")
-                            if img_url:
-                                # Use image-to-video model with character image
-                                rsp = VideoSynthesis.call(
-                                    model="wan2.2-i2v-flash",
-                                    prompt=prompt,
-                                    img_url=img_url,
-                                    resolution="480P"
-                                )
-                                # Save the image URL for use in subsequent scenes
-                                previous_image_url = img_url
-                            else:
-                                print(f"Failed to encode and resize character image, falling back to text-to-video for scene {i + 1}")
-                                rsp = VideoSynthesis.call(
-                                    model="wan2.2-t2v-plus", prompt=prompt, size="832*480"
-                                )
+        for i in scene_indices:
+            prompt = prompts[i]
+            img_url = None
+            try:
+                video_logger.info("Generating video for scene %s/%s: %.50s...", i + 1, len(prompts), prompt,
+                                 user_id=state.get("user_id"),
+                                 video_id=state.get("video_db_id"),
+                                 scene_index=i)
+                
+                # For the first scene, use character image if provided and exists
+                # For subsequent scenes, use image editing API
+                if i == 0:
+                    # First scene - use user-provided image if available
+                    character_image_path = state.get("character_image_path")
+                    if character_image_path and isinstance(character_image_path, str) and os.path.exists(character_image_path):
+                        video_logger.info("Using character image with image-to-video (wan2.2-i2v-flash)", scene_index=i)
+                        # Resize the character image and upload it (or encode it as a data URI)
+                        img_url = await asyncio.to_thread(prepare_image_url, character_image_path)
+                        if img_url:
+                            # Save the image URL for use in subsequent scenes
+                            previous_image_url = img_url
                         else:
-                            print(f"Using text-to-video (wan2.2-t2v-plus) for scene {i + 1}")
-                            rsp = VideoSynthesis.call(
-                                model="wan2.2-t2v-plus", prompt=prompt, size="832*480"
-                            )
+                            video_logger.warning("Failed to prepare character image, falling back to text-to-video", scene_index=i)
                     else:
-                        # Subsequent scenes - use image editing API
-                        if previous_image_url:
-                            # Generate edit prompt based on scene transition
-                            previous_scene = state["storyboard"][i-1]
-                            edit_prompt = generate_image_edit_prompt(previous_scene, scene)
-                            
-                            print(f"Creating image editing task for scene {i + 1}")
-                            edited_image_url = edit_image_with_qwen(edit_prompt, previous_image_url)
-                            
-                            if edited_image_url:
-                                print(f"Using edited image with image-to-video (wan2.2-i2v-flash) for scene {i + 1}")
-                                # Use image-to-video model with edited image
-                                rsp = VideoSynthesis.call(
-                                    model="wan2.2-i2v-flash",
-                                    prompt=prompt,
-                                    img_url=edited_image_url,
-                                    resolution="480P"
-                                )
-                                # Update previous_image_url for next iteration
-                                previous_image_url = edited_image_url
-                            else:
-                                print(f"Failed to create image editing task, falling back to text-to-video for scene {i + 1}")
-                                rsp = VideoSynthesis.call(
-                                    model="wan2.2-t2v-plus", prompt=prompt, size="832*480"
-                                )
+                        video_logger.info("Using text-to-video (wan2.2-t2v-plus)", scene_index=i)
+                else:
+                    # Subsequent scenes - use image editing API
+                    if previous_image_url:
+                        # Generate edit prompt based on scene transition
+                        edit_prompt = _transition_edit_prompt(prompts[i - 1], prompt)
+                        
+                        video_logger.info("Creating image editing task", scene_index=i)
+                        edited_image_url = await asyncio.to_thread(edit_image_with_qwen, edit_prompt, previous_image_url)
+                        
+                        if edited_image_url:
+                            video_logger.info("Using edited image with image-to-video (wan2.2-i2v-flash)", scene_index=i)
+                            img_url = edited_image_url
+                            # Update previous_image_url for next iteration
+                            previous_image_url = edited_image_url
                         else:
-                            print(f"No previous image available, using text-to-video (wan2.2-t2v-plus) for scene {i + 1}")
-                            rsp = VideoSynthesis.call(
-                                model="wan2.2-t2v-plus", prompt=prompt, size="832*480"
-                            )
-
-                    if rsp.status_code == HTTPStatus.OK:
-                        video_url = rsp.output.video_url
-                        print(f"Video generated successfully: {video_url}")
-
-                        import urllib.request
-
-                        video_filename = f"{i}.mp4"
-                        video_filepath = os.path.join(video_dir, video_filename)
+                            video_logger.warning("Failed to edit image, falling back to text-to-video", scene_index=i)
+                    else:
+                        video_logger.info("No previous image available, using text-to-video (wan2.2-t2v-plus)", scene_index=i)
+            except Exception as e:
+                video_logger.error("Error preparing image for scene", scene_index=i, error=e)
+                img_url = None
 
-                        ssl_context = ssl.create_default_context()
-                        ssl_context.check_hostname = False
-                        ssl_context.verify_mode = ssl.CERT_NONE
+            tasks[i] = asyncio.create_task(_generate(i, prompt, img_url))
 
-                        urllib.request.urlretrieve(video_url, video_filepath)
-                        print(f"Video downloaded to: {video_filepath}")
-                        video_segments.append(video_filepath)
-                    else:
-                        print(
-                            f'Failed to generate video, status_code: {rsp.status_code}, code: {rsp.code}, message: {rsp.message}')
-                        video_segments.append(None)
-                except Exception as e:
-                    print(f"Error generating video for scene {i}: {e}")
-                    # Add a placeholder for failed video
-                    video_segments.append(None)
-            else:
-                print(f"Warning: No prompt found for scene {i}")
-                video_segments.append(None)
+        # 按场景下标写入结果，没有描述或失败的场景为None
+        video_segments: list[str | None] = [None] * len(prompts)
+        media_durations: dict[str, float] = {}
+        for i, task in tasks.items():
+            path, duration = await task
+            video_segments[i] = path
+            if path and duration > 0:
+                media_durations[path] = duration
     except Exception as e:
+        for task in tasks.values():
+            task.cancel()
         video_logger.log_exception("Video generation failed", e,
                                   user_id=state.get("user_id"),
                                   video_id=state.get("video_db_id"))
         raise
+    finally:
+        await http_client.aclose()
 
     return {
-        "video_segments": video_segments
+        "video_segments": video_segments,
+        "media_durations": media_durations,
     }
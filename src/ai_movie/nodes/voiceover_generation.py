@@ -1,11 +1,21 @@
+import asyncio
+import functools
+import hashlib
 import os
+import shutil
+import threading
+import wave
 from typing import Any
 
 import dashscope
-from dashscope.audio.tts_v2 import SpeechSynthesizer
+import diskcache
+from dashscope.audio.tts_v2 import AudioFormat, SpeechSynthesizer
 from openai import OpenAI
 
 from .state import VideoGenerationState
+from ai_movie.core.config import get_config
+from ai_movie.core.disk_cache import get_disk_cache
+from ai_movie.core.logging_config import video_logger
 
 # 音色列表
 VOICE_LIST = [
@@ -32,6 +42,65 @@ VOICE_LIST = [
     {"name": "龙可", "voice": "longke_v2", "traits": "懵懂乖乖女", "scenarios": "童声", "languages": "中、英"}
 ]
 
+# 音色列表描述，导入时构建一次
+_VOICE_DESCRIPTIONS = "\n".join(
+    f"- {voice['scenarios']}场景 {voice['name']} ({voice['traits']}) - voice参数: {voice['voice']} - 语言支持: {voice['languages']}"
+    for voice in VOICE_LIST
+)
+
+# 模型未返回合法音色或调用失败时使用的默认音色
+DEFAULT_VOICE = "longhua_v2"
+
+# 合法音色ID集合，用于校验模型返回值
+_VALID_VOICE_IDS = frozenset(voice["voice"] for voice in VOICE_LIST)
+
+# 选音色提示词中除用户文本外的固定部分
+_VOICE_PROMPT_PREFIX = f"""你是资深语音导演，唯一任务是：根据用户给出的纯文本内容，从下方「音色库」中选出最合适的音色ID，直接返回该ID，不要解释、不要多余字符。
+
+规则：
+1. 先判断文本语言（zh/cn/en），再判断场景（新闻/故事/客服/儿童/方言/营销…），最后判断情绪（中性/欢快/悲伤/惊悚…）。
+2. 若文本含多语言，以主要语言为准；若场景冲突，以"场景"优先级高于"情绪"。
+3. 只能输出一个存在于音色库里的ID，禁止编造。
+
+音色库：
+{_VOICE_DESCRIPTIONS}
+
+用户文本内容：
+"""
+
+# 文本哈希 -> 模型选出的音色ID；键包含音色库描述，音色库变更后自动失效
+# 各场景的选音色在 to_thread 工作线程中并发执行，读写都需持有 _voice_cache_lock
+_voice_cache: dict[str, str] = {}
+_voice_cache_lock = threading.Lock()
+_VOICE_CACHE_MAXSIZE = 256
+
+
+def _voice_cache_key(text: str) -> str:
+    return hashlib.blake2b(f"{_VOICE_DESCRIPTIONS}\0{text}".encode(), digest_size=16).hexdigest()
+
+
+# 语音合成结果磁盘缓存，按 (模型, 音频格式, 音色, 文本) 的哈希索引
+_TTS_MODEL = "cosyvoice-v2"
+# 以PCM合成并写成WAV：时长可由字节数和采样率直接算出，后续合并无需再探测音频
+_TTS_FORMAT = AudioFormat.PCM_22050HZ_MONO_16BIT
+_TTS_SAMPLE_WIDTH = 2
+
+
+def _tts_cache_key(text: str, voice: str) -> str:
+    return hashlib.sha1(f"{_TTS_MODEL}:{_TTS_FORMAT.name}:{voice}:{text}".encode()).hexdigest()
+
+
+def _wav_duration(file_path: str) -> float:
+    """读取WAV文件头计算时长（秒）"""
+    with wave.open(file_path, "rb") as f:
+        return f.getnframes() / f.getframerate()
+
+
+@functools.lru_cache(maxsize=4)
+def _get_client(api_key: str, base_url: str, timeout: float) -> OpenAI:
+    """按 (api_key, base_url, timeout) 缓存客户端，复用连接池"""
+    return OpenAI(api_key=api_key, base_url=base_url, timeout=timeout)
+
 
 def select_voice_by_text(text: str, dashscope_api_key: str = None) -> str:
     """
@@ -44,31 +113,23 @@ def select_voice_by_text(text: str, dashscope_api_key: str = None) -> str:
     Returns:
         最合适的音色ID
     """
-    # 构建音色列表描述
-    voice_descriptions = "\n".join([
-        f"- {voice['scenarios']}场景 {voice['name']} ({voice['traits']}) - voice参数: {voice['voice']} - 语言支持: {voice['languages']}"
-        for voice in VOICE_LIST
-    ])
+    # 相同文本已选过音色时直接返回，省去一次模型调用
+    cache_key = _voice_cache_key(text)
+    with _voice_cache_lock:
+        cached_voice = _voice_cache.get(cache_key)
+    if cached_voice is not None:
+        return cached_voice
     
     # 构建提示词
-    prompt = f"""你是资深语音导演，唯一任务是：根据用户给出的纯文本内容，从下方「音色库」中选出最合适的音色ID，直接返回该ID，不要解释、不要多余字符。
-
-规则：
-1. 先判断文本语言（zh/cn/en），再判断场景（新闻/故事/客服/儿童/方言/营销…），最后判断情绪（中性/欢快/悲伤/惊悚…）。
-2. 若文本含多语言，以主要语言为准；若场景冲突，以"场景"优先级高于"情绪"。
-3. 只能输出一个存在于音色库里的ID，禁止编造。
-
-音色库：
-{voice_descriptions}
-
-用户文本内容：
-{text}"""
+    prompt = _VOICE_PROMPT_PREFIX + text
 
     try:
-        # 初始化DashScope客户端
-        client = OpenAI(
-            api_key=dashscope_api_key or os.getenv("DASHSCOPE_API_KEY"),
-            base_url="https://dashscope.aliyuncs.com/compatible-mode/v1",
+        # 获取（复用）DashScope客户端
+        ai_config = get_config().ai
+        client = _get_client(
+            dashscope_api_key or os.getenv("DASHSCOPE_API_KEY"),
+            ai_config.dashscope_base_url,
+            ai_config.api_timeout,
         )
         
         # 调用模型选择音色
@@ -82,39 +143,74 @@ def select_voice_by_text(text: str, dashscope_api_key: str = None) -> str:
         
         voice_id = completion.choices[0].message.content.strip()
         # 验证返回的音色ID是否在列表中
-        for voice in VOICE_LIST:
-            if voice["voice"] == voice_id:
-                return voice_id
+        if voice_id in _VALID_VOICE_IDS:
+            with _voice_cache_lock:
+                if len(_voice_cache) >= _VOICE_CACHE_MAXSIZE:
+                    _voice_cache.pop(next(iter(_voice_cache)))
+                _voice_cache[cache_key] = voice_id
+            return voice_id
         
         # 如果返回的ID不在列表中，使用默认音色
-        return "longhua_v2"
+        return DEFAULT_VOICE
     except Exception as e:
-        print(f"Error selecting voice: {e}")
+        video_logger.error("Error selecting voice: %s", e)
         # 出错时使用默认音色
-        return "longhua_v2"
+        return DEFAULT_VOICE
 
 
-def synthesize_speech_from_text(text: str, file_path: str, voice: str = "longhua_v2"):
+def synthesize_speech_from_text(text: str, file_path: str, voice: str = DEFAULT_VOICE) -> float:
+    """合成语音并写入WAV文件，返回音频时长（秒）"""
     try:
         speech_synthesizer = SpeechSynthesizer(
-            model="cosyvoice-v2",
+            model=_TTS_MODEL,
             voice=voice,
+            format=_TTS_FORMAT,
             callback=None,
         )
         audio = speech_synthesizer.call(text)
-        with open(file_path, "wb") as f:
-            f.write(audio)
-        print(f"Synthesized text {text} to file : {file_path}")
-        print(
-            f"[Metric] requestId: {speech_synthesizer.get_last_request_id()}, first package delay ms: {speech_synthesizer.get_first_package_delay()}"
+        with wave.open(file_path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(_TTS_SAMPLE_WIDTH)
+            f.setframerate(_TTS_FORMAT.sample_rate)
+            f.writeframes(audio)
+        video_logger.info(
+            "Synthesized speech",
+            audio_path=file_path,
+            text_length=len(text),
+            request_id=speech_synthesizer.get_last_request_id(),
+            first_package_delay_ms=speech_synthesizer.get_first_package_delay(),
         )
+        return len(audio) / (_TTS_FORMAT.sample_rate * _TTS_SAMPLE_WIDTH)
     except Exception as e:
-        print(f"Error synthesizing speech: {e}")
+        video_logger.error("Error synthesizing speech: %s", e, audio_path=file_path)
         raise e
 
 
+def _synthesize_with_cache(text: str, file_path: str, voice: str) -> float:
+    """合成语音，相同音色和文本已合成过时直接复制缓存内容，返回音频时长（秒）"""
+    cache = get_disk_cache("tts", get_config().ai.tts_cache_size_mb)
+    key = _tts_cache_key(text, voice)
+    cached = cache.get(key, read=True)
+    if cached is not None:
+        with cached, open(file_path, "wb") as f:
+            shutil.copyfileobj(cached, f)
+        video_logger.info("Reused cached speech", audio_path=file_path)
+        return _wav_duration(file_path)
+    
+    duration = synthesize_speech_from_text(text, file_path, voice)
+    
+    try:
+        with open(file_path, "rb") as f:
+            cache.set(key, f, read=True)
+    except (OSError, diskcache.Timeout) as e:
+        video_logger.warning("Failed to cache speech: %s", e, audio_path=file_path)
+    return duration
+
+
 async def voiceover_generation_node(state: VideoGenerationState) -> dict[str, Any]:
-    print("Executing: Voiceover generation node")
+    video_logger.log_task_start("voiceover_generation",
+                               user_id=state.get("user_id"),
+                               video_id=state.get("video_db_id"))
 
     if not dashscope.api_key:
         raise Exception("DASHSCOPE_API_KEY environment variable is not set")
@@ -123,27 +219,54 @@ async def voiceover_generation_node(state: VideoGenerationState) -> dict[str, An
     # 确保音频目录存在
     os.makedirs(timestamped_audio_dir, exist_ok=True)
     audio_files = []
+    # 音频路径 -> 时长（秒），供合并节点决定是否需要补静音
+    media_durations: dict[str, float] = {}
 
     try:
+        # 优先使用分镜节点拆出的台词数组，直接调用节点时再从 storyboard 提取
+        dialogues = state.get("dialogues") or [scene.get("dialogue", "") for scene in state["storyboard"]]
+
         # 分析整个故事板的文本，选择最合适的音色
-        all_dialogues = " ".join([scene.get("dialogue", "") for scene in state["storyboard"] if scene.get("dialogue")])
-        selected_voice = select_voice_by_text(all_dialogues, dashscope.api_key)
-        print(f"Selected voice: {selected_voice}")
+        all_dialogues = " ".join([dialogue for dialogue in dialogues if dialogue])
+        selected_voice = await asyncio.to_thread(select_voice_by_text, all_dialogues, dashscope.api_key)
+        video_logger.info("Selected voice", voice=selected_voice)
 
-        for i, scene in enumerate(state["storyboard"]):
-            dialogue = scene.get("dialogue", "")
+        # 各场景语音合成互不依赖，并发执行，数量受配置限制
+        ai_config = get_config().ai
+        semaphore = asyncio.Semaphore(max(ai_config.max_parallel_tts_jobs, 1))
+        synthesize = _synthesize_with_cache if ai_config.tts_cache_enabled else synthesize_speech_from_text
 
+        async def _tts(dialogue: str, file_path: str) -> None:
+            async with semaphore:
+                media_durations[file_path] = await asyncio.to_thread(synthesize, dialogue, file_path, selected_voice)
+
+        jobs = []
+        # 重复的台词只合成一次，其余场景复制首次合成的文件
+        first_paths: dict[str, str] = {}
+        copies: list[tuple[str, str]] = []
+        for i, dialogue in enumerate(dialogues):
             if dialogue:
-                file_name = f"{i}.mp3"
+                file_name = f"{i}.wav"
                 file_path = os.path.join(timestamped_audio_dir, file_name)
-                synthesize_speech_from_text(dialogue, file_path, selected_voice)
+                if dialogue in first_paths:
+                    copies.append((first_paths[dialogue], file_path))
+                else:
+                    first_paths[dialogue] = file_path
+                    jobs.append(_tts(dialogue, file_path))
 
                 audio_files.append(file_path)
             else:
-                print(f"Warning: No dialogue found for scene {i}")
+                video_logger.warning("No dialogue found for scene", scene_index=i)
+
+        await asyncio.gather(*jobs)
+        for source_path, file_path in copies:
+            shutil.copyfile(source_path, file_path)
+            media_durations[file_path] = media_durations[source_path]
 
     except Exception as e:
-        print(f"Error generating voiceovers: {e}")
+        video_logger.log_exception("Error generating voiceovers", e,
+                                  user_id=state.get("user_id"),
+                                  video_id=state.get("video_db_id"))
         raise Exception(f"Error generating voiceovers: {e}")
 
-    return {"audio_files": audio_files}
\ No newline at end of file
+    return {"audio_files": audio_files, "media_durations": media_durations}
\ No newline at end of file
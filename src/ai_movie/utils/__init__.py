@@ -4,24 +4,41 @@ Utility functions and helpers for AI Movie Generator
 Contains common utility functions used across the application.
 """
 
-from .utils import (
-    parse_user_input,
-    generate_voiceovers,
-    generate_copywriting,
-    generate_storyboard,
-    generate_video_scenes,
-    concatenate_videos_with_audio,
-    upload_to_oss_wrapper,
-)
-from .oss import upload_to_oss
+import importlib
+
+# 导出名 -> 所在子模块，按需导入；导入 ai_movie.utils.oss 等子模块时不会连带加载各节点，
+# 避免 nodes.video_generation -> utils.oss -> utils.utils -> nodes.video_generation 的循环导入
+_EXPORT_MODULES = {
+    "parse_user_input": "utils",
+    "generate_voiceovers": "utils",
+    "generate_copywriting": "utils",
+    "generate_storyboard": "utils",
+    "generate_video_scenes": "utils",
+    "concatenate_videos_with_audio": "utils",
+    "upload_to_oss_wrapper": "utils",
+    "upload_to_oss": "oss",
+}
 
 __all__ = [
     "parse_user_input",
     "generate_voiceovers",
-    "generate_copywriting", 
+    "generate_copywriting",
     "generate_storyboard",
     "generate_video_scenes",
     "concatenate_videos_with_audio",
     "upload_to_oss_wrapper",
     "upload_to_oss",
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    module_name = _EXPORT_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
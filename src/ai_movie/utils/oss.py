@@ -3,25 +3,63 @@ OSS相关工具函数
 
 将OSS上传功能独立出来，避免循环导入问题。
 """
+import functools
+import itertools
 import os
-import uuid
+import secrets
+import time
 from typing import Any
 
 import oss2
 
+# 文件名前缀由时间戳、进程标识和进程内递增计数组成；进程标识只在导入时随机生成一次，
+# 避免多台机器（如容器内进程号相同）之间冲突
+_PROCESS_TOKEN = secrets.token_hex(4)
+_upload_counter = itertools.count()
+
+# 超过该大小的文件使用分片并发上传
+_MULTIPART_THRESHOLD = 10 * 1024 * 1024
+
+
+@functools.lru_cache(maxsize=8)
+def get_bucket(access_key_id: str, access_key_secret: str, endpoint: str, bucket_name: str) -> oss2.Bucket:
+    """按凭据和bucket缓存 oss2.Bucket，复用底层连接池和签名器"""
+    auth = oss2.Auth(access_key_id, access_key_secret)
+    return oss2.Bucket(auth, endpoint, bucket_name)
+
+
+def resumable_upload(bucket: oss2.Bucket, oss_path: str, file_path: str, oss_config: dict):
+    """断点续传上传文件：超过阈值时分片，多线程并发上传各分片"""
+    # 分片大小约为文件的1/16（不小于1MB），并保证分片数不超过OSS上限
+    file_size = os.path.getsize(file_path)
+    preferred_size = oss_config.get('part_size') or max(1 << 20, file_size // 16)
+    return oss2.resumable_upload(
+        bucket, oss_path, file_path,
+        multipart_threshold=oss_config.get('multipart_threshold', _MULTIPART_THRESHOLD),
+        part_size=oss2.determine_part_size(file_size, preferred_size=preferred_size),
+        num_threads=oss_config.get('num_threads', min(8, os.cpu_count() or 1)),
+    )
+
+
+def _object_path(oss_config: dict, base_name: str) -> str:
+    """生成带唯一前缀的OSS对象路径"""
+    file_name = f"{time.time_ns() // 1_000_000:x}-{_PROCESS_TOKEN}-{next(_upload_counter):x}_{base_name}"
+    return f"{oss_config.get('prefix', 'videos')}/{file_name}"
+
 
 def upload_to_oss(file_path: str, oss_config: dict) -> dict[str, Any]:
     """使用断点续传和分片上传OSS"""
-    auth = oss2.Auth(oss_config['access_key_id'], oss_config['access_key_secret'])
-    bucket = oss2.Bucket(auth, oss_config['endpoint'], oss_config['bucket'])
+    bucket = get_bucket(
+        oss_config['access_key_id'], oss_config['access_key_secret'],
+        oss_config['endpoint'], oss_config['bucket'],
+    )
     
     # 生成唯一文件名
-    file_name = f"{uuid.uuid4()}_{os.path.basename(file_path)}"
-    oss_path = f"{oss_config.get('prefix', 'videos')}/{file_name}"
+    oss_path = _object_path(oss_config, os.path.basename(file_path))
     
     try:
         # 使用断点续传
-        rep = oss2.resumable_upload(bucket, oss_path, file_path)
+        rep = resumable_upload(bucket, oss_path, file_path, oss_config)
         oss_url = f"https://{oss_config['bucket']}.{oss_config['endpoint']}/{oss_path}"
         return {
             "oss_url": oss_url,
@@ -35,4 +73,38 @@ def upload_to_oss(file_path: str, oss_config: dict) -> dict[str, Any]:
             "oss_request_id": None,
             "oss_file_path": None,
             "error": str(e)
-        }
\ No newline at end of file
+        }
+
+
+def upload_bytes_to_oss(data: bytes, file_name: str, oss_config: dict,
+                        url_expires: int | None = None) -> dict[str, Any]:
+    """
+    直接上传内存中的数据到OSS（适合小文件，无需先写入磁盘）
+    
+    url_expires 不为None时返回有效期为该秒数的签名URL，私有bucket中的对象也可被外部服务读取。
+    """
+    bucket = get_bucket(
+        oss_config['access_key_id'], oss_config['access_key_secret'],
+        oss_config['endpoint'], oss_config['bucket'],
+    )
+    oss_path = _object_path(oss_config, file_name)
+    
+    try:
+        rep = bucket.put_object(oss_path, data)
+        if url_expires is None:
+            oss_url = f"https://{oss_config['bucket']}.{oss_config['endpoint']}/{oss_path}"
+        else:
+            oss_url = bucket.sign_url('GET', oss_path, url_expires, slash_safe=True)
+        return {
+            "oss_url": oss_url,
+            "oss_request_id": rep.request_id,
+            "oss_file_path": oss_path
+        }
+    except Exception as e:
+        print(f"OSS upload failed: {e}")
+        return {
+            "oss_url": None,
+            "oss_request_id": None,
+            "oss_file_path": None,
+            "error": str(e)
+        }
@@ -3,35 +3,100 @@ OSS配置修复工具
 
 确保OSS配置在所有场景下都正确加载和使用。
 """
+import functools
 import os
+import threading
+import uuid
 from typing import Dict, Any, Optional
-from dotenv import load_dotenv
+from dotenv import find_dotenv, load_dotenv
 
-from ..core.config import config
+from ..core.config import get_config
 from ..core.logging_config import get_logger
 
+try:
+    import oss2
+except ImportError:  # pragma: no cover - 未安装oss2时各函数返回失败结果
+    oss2 = None
+else:
+    from .oss import get_bucket, resumable_upload
+
 logger = get_logger(__name__)
 
 
+# (配置键, 环境变量名, 默认值)
+_OSS_ENV_FIELDS = (
+    ('access_key_id', 'OSS_ACCESS_KEY_ID', None),
+    ('access_key_secret', 'OSS_ACCESS_KEY_SECRET', None),
+    ('endpoint', 'OSS_ENDPOINT', None),
+    ('bucket', 'OSS_BUCKET', None),
+    ('prefix', 'OSS_PREFIX', 'videos'),
+)
+
+# 最近一次验证通过的OSS配置及对应的 (.env 修改时间, OSS_* 环境变量取值)
+_oss_config_cache: tuple[tuple, Dict[str, Any]] | None = None
+_oss_config_lock = threading.Lock()
+
+# 连接测试时 HEAD 的对象名，不需要真实存在
+_HEALTHCHECK_KEY = '___healthcheck___'
+
+
+@functools.cache
+def _dotenv_path() -> str:
+    """定位 .env 文件（只查找一次），找不到时返回空字符串"""
+    return os.environ.get('DOTENV_PATH') or find_dotenv()
+
+
+def _dotenv_mtime() -> int | None:
+    path = _dotenv_path()
+    if not path:
+        return None
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _oss_config_cache_key() -> tuple:
+    """缓存键：.env 修改时间加上各 OSS_* 环境变量的当前值，任一变化都会重新加载"""
+    return _dotenv_mtime(), tuple(os.environ.get(env_name) for _, env_name, _ in _OSS_ENV_FIELDS)
+
+
 def get_oss_config_safe() -> Dict[str, Any]:
     """
     安全获取OSS配置，确保不会返回占位符
     
+    .env 文件和 OSS_* 环境变量均未变化时直接返回上次验证通过的配置，不再重复解析。
+    
     Returns:
         Dict[str, Any]: OSS配置字典
     """
-    # 强制重新加载环境变量
-    load_dotenv(override=True)
+    global _oss_config_cache
     
-    # 直接从环境变量获取配置
-    oss_config = {
-        'access_key_id': os.getenv('OSS_ACCESS_KEY_ID'),
-        'access_key_secret': os.getenv('OSS_ACCESS_KEY_SECRET'),
-        'endpoint': os.getenv('OSS_ENDPOINT'),
-        'bucket': os.getenv('OSS_BUCKET'),
-        'prefix': os.getenv('OSS_PREFIX', 'videos')
-    }
+    cache_key = _oss_config_cache_key()
+    cached = _oss_config_cache
+    if cached is not None and cached[0] == cache_key:
+        return dict(cached[1])
     
+    with _oss_config_lock:
+        cached = _oss_config_cache
+        if cached is not None and cached[0] == cache_key:
+            return dict(cached[1])
+        
+        # .env 有变化时重新加载环境变量
+        if cached is None or cached[0][0] != cache_key[0]:
+            load_dotenv(_dotenv_path() or None, override=True)
+        
+        # 直接从环境变量获取配置
+        oss_config = {key: os.getenv(env_name, default) for key, env_name, default in _OSS_ENV_FIELDS}
+        _validate_oss_config(oss_config)
+        
+        # 以加载 .env 之后的环境变量取值作为缓存键
+        _oss_config_cache = (_oss_config_cache_key(), oss_config)
+        return dict(oss_config)
+
+
+def _validate_oss_config(oss_config: Dict[str, Any]) -> None:
+    """校验OSS配置不是占位符且必需字段齐全，不通过时抛出 ValueError"""
     # 验证配置不是占位符
     forbidden_values = [
         'your-access-key-id',
@@ -57,7 +122,6 @@ def get_oss_config_safe() -> Dict[str, Any]:
             raise ValueError(error_msg)
     
     logger.info(f"OSS配置验证通过: bucket={oss_config['bucket']}, endpoint={oss_config['endpoint']}")
-    return oss_config
 
 
 def validate_oss_endpoint(oss_config: Dict[str, Any]) -> bool:
@@ -102,9 +166,11 @@ def test_oss_connection_safe(oss_config: Optional[Dict[str, Any]] = None) -> boo
     Returns:
         bool: 连接是否成功
     """
+    if oss2 is None:
+        logger.error("oss2库未安装")
+        return False
+    
     try:
-        import oss2
-        
         if oss_config is None:
             oss_config = get_oss_config_safe()
         
@@ -112,14 +178,24 @@ def test_oss_connection_safe(oss_config: Optional[Dict[str, Any]] = None) -> boo
         if not validate_oss_endpoint(oss_config):
             return False
         
-        # 创建认证和bucket对象
-        auth = oss2.Auth(oss_config['access_key_id'], oss_config['access_key_secret'])
-        bucket = oss2.Bucket(auth, oss_config['endpoint'], oss_config['bucket'])
+        # 获取（复用）bucket对象
+        bucket = get_bucket(
+            oss_config['access_key_id'], oss_config['access_key_secret'],
+            oss_config['endpoint'], oss_config['bucket'],
+        )
         
-        # 测试连接：获取bucket信息
+        # 测试连接：HEAD 一个不存在的对象，无响应体也无需解析XML
+        # 返回 NoSuchKey 即说明域名解析、TLS、鉴权和bucket均正常
         try:
-            bucket_info = bucket.get_bucket_info()
-            logger.info(f"OSS连接成功: {bucket_info.name}")
+            try:
+                bucket.head_object(_HEALTHCHECK_KEY)
+            except oss2.exceptions.NoSuchBucket:
+                raise
+            except oss2.exceptions.NotFound as e:
+                # HEAD 的404没有响应体，旧版oss2无法区分对象和bucket不存在，此时再查询bucket信息确认
+                if e.code != 'NoSuchKey':
+                    bucket.get_bucket_info()
+            logger.info(f"OSS连接成功: {oss_config['bucket']}")
             return True
         except oss2.exceptions.NoSuchBucket:
             logger.error(f"Bucket不存在: {oss_config['bucket']}")
@@ -131,9 +207,6 @@ def test_oss_connection_safe(oss_config: Optional[Dict[str, Any]] = None) -> boo
             logger.error(f"OSS连接失败: {e}")
             return False
             
-    except ImportError:
-        logger.error("oss2库未安装")
-        return False
     except Exception as e:
         logger.error(f"OSS连接测试异常: {e}")
         return False
@@ -150,10 +223,15 @@ def upload_to_oss_safe(file_path: str, oss_config: Optional[Dict[str, Any]] = No
     Returns:
         Dict[str, Any]: 上传结果
     """
+    if oss2 is None:
+        return {
+            "oss_url": None,
+            "oss_request_id": None,
+            "oss_file_path": None,
+            "error": "oss2库未安装"
+        }
+    
     try:
-        import oss2
-        import uuid
-        
         if oss_config is None:
             oss_config = get_oss_config_safe()
         
@@ -175,9 +253,11 @@ def upload_to_oss_safe(file_path: str, oss_config: Optional[Dict[str, Any]] = No
                 "error": f"文件不存在: {file_path}"
             }
         
-        # 创建认证和bucket对象
-        auth = oss2.Auth(oss_config['access_key_id'], oss_config['access_key_secret'])
-        bucket = oss2.Bucket(auth, oss_config['endpoint'], oss_config['bucket'])
+        # 获取（复用）bucket对象
+        bucket = get_bucket(
+            oss_config['access_key_id'], oss_config['access_key_secret'],
+            oss_config['endpoint'], oss_config['bucket'],
+        )
         
         # 生成唯一文件名
         file_name = f"{uuid.uuid4()}_{os.path.basename(file_path)}"
@@ -185,8 +265,8 @@ def upload_to_oss_safe(file_path: str, oss_config: Optional[Dict[str, Any]] = No
         
         logger.info(f"开始上传文件到OSS: {file_path} -> {oss_path}")
         
-        # 使用断点续传
-        result = oss2.resumable_upload(bucket, oss_path, file_path)
+        # 使用断点续传，大文件分片并发上传
+        result = resumable_upload(bucket, oss_path, file_path, oss_config)
         
         # 构建OSS URL
         oss_url = f"https://{oss_config['bucket']}.{oss_config['endpoint']}/{oss_path}"
@@ -3,19 +3,57 @@ API调用限流控制模块
 
 实现智能的API调用频率控制和重试机制，解决DashScope API限流问题。
 """
+import array
+import random
+import re
 import time
 import asyncio
 import threading
 from typing import Optional, Dict, Any, Callable
-from functools import wraps
+from functools import lru_cache, wraps
 from dataclasses import dataclass
-from collections import defaultdict, deque
+from collections import defaultdict
 
 from ..core.exceptions import APIException, DashScopeAPIException
 from ..core.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# 可重试错误的关键字，编译为一个正则，一次扫描完成匹配
+_RETRYABLE_ERRORS = (
+    'rate limit',
+    'throttling',
+    'quota',
+    'too many requests',
+    'timeout',
+    '429',
+    'service unavailable',
+    '503',
+    'connection',
+    'network',
+)
+_RETRYABLE_RE = re.compile('|'.join(map(re.escape, _RETRYABLE_ERRORS)), re.IGNORECASE)
+_RATE_LIMIT_RE = re.compile('rate limit|throttling', re.IGNORECASE)
+_NETWORK_RE = re.compile('timeout|network', re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def _classify(err_msg: str) -> tuple[bool, str]:
+    """
+    按错误消息分类（正则不区分大小写），相同消息在多次重试间只需扫描一次
+
+    Returns:
+        (是否可重试, 类别)，类别为 "rate"（限流）、"net"（超时/网络）或 "other"
+    """
+    retryable = _RETRYABLE_RE.search(err_msg) is not None
+    if _RATE_LIMIT_RE.search(err_msg):
+        category = "rate"
+    elif _NETWORK_RE.search(err_msg):
+        category = "net"
+    else:
+        category = "other"
+    return retryable, category
+
 
 @dataclass
 class RateLimitConfig:
@@ -43,7 +81,8 @@ class TokenBucket:
         self.capacity = capacity
         self.tokens = capacity
         self.refill_rate = refill_rate
-        self.last_refill = time.time()
+        # 使用单调时钟，不受系统时间调整影响
+        self.last_refill = time.monotonic()
         self._lock = threading.Lock()
     
     def acquire(self, tokens: int = 1) -> bool:
@@ -56,6 +95,10 @@ class TokenBucket:
         Returns:
             bool: 是否成功获取令牌
         """
+        # 快速路径：补充后仍不够时无需加锁直接返回
+        if self.tokens + (time.monotonic() - self.last_refill) * self.refill_rate < tokens:
+            return False
+        
         with self._lock:
             self._refill()
             if self.tokens >= tokens:
@@ -63,9 +106,14 @@ class TokenBucket:
                 return True
             return False
     
+    def time_until_available(self, tokens: int = 1) -> float:
+        """距离可获取指定数量令牌还需等待的秒数"""
+        deficit = tokens - (self.tokens + (time.monotonic() - self.last_refill) * self.refill_rate)
+        return max(0.0, deficit / self.refill_rate)
+    
     def _refill(self):
         """补充令牌"""
-        now = time.time()
+        now = time.monotonic()
         tokens_to_add = (now - self.last_refill) * self.refill_rate
         self.tokens = min(self.capacity, self.tokens + tokens_to_add)
         self.last_refill = now
@@ -87,10 +135,13 @@ class APIRateLimiter:
             refill_rate=self.config.max_calls_per_second
         )
         
-        # 记录最后调用时间
-        self._last_call_time = 0
-        self._call_times = deque()  # 记录调用时间用于统计
-        self._lock = threading.Lock()
+        # 记录最后调用时间（单调时钟）
+        self._last_call_time = float('-inf')
+        # 最近调用时间的环形缓冲区，用于统计；一分钟内最多为桶容量加一分钟的补充量
+        self._call_times = array.array('d', [float('-inf')]) * max(2 * self.config.max_calls_per_minute, 1)
+        self._call_index = 0
+        # 等待者在条件变量上按所需时间挂起，获得许可后唤醒下一个等待者
+        self._cond = threading.Condition()
         
         logger.info(f"API限流器初始化: {self.config}")
     
@@ -104,53 +155,53 @@ class APIRateLimiter:
         Returns:
             bool: 是否获得许可
         """
-        start_time = time.time()
+        deadline = time.monotonic() + timeout
         
-        while time.time() - start_time < timeout:
-            # 检查最小间隔
-            with self._lock:
-                now = time.time()
-                time_since_last_call = now - self._last_call_time
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                # 检查最小间隔
+                wait = self.config.min_interval - (now - self._last_call_time)
                 
-                if time_since_last_call < self.config.min_interval:
-                    sleep_time = self.config.min_interval - time_since_last_call
-                    time.sleep(sleep_time)
-                    now = time.time()
+                if wait <= 0:
+                    # 尝试获取令牌
+                    if (self.minute_bucket.acquire() and 
+                        self.second_bucket.acquire()):
+                        self._last_call_time = now
+                        self._record_call_time(now)
+                        # 唤醒下一个等待者重新计算等待时间
+                        self._cond.notify()
+                        return True
+                    # 按令牌补充速度计算需要等待的时间
+                    wait = max(self.minute_bucket.time_until_available(),
+                               self.second_bucket.time_until_available())
                 
-                # 尝试获取令牌
-                if (self.minute_bucket.acquire() and 
-                    self.second_bucket.acquire()):
-                    self._last_call_time = now
-                    self._record_call_time(now)
-                    return True
-            
-            # 没有获得许可，等待一段时间再试
-            time.sleep(0.1)
-        
-        return False
+                # 在条件变量上等待恰好所需的时间（期间释放锁），而不是固定间隔轮询
+                remaining = deadline - now
+                if remaining <= 0:
+                    return False
+                self._cond.wait(timeout=min(max(wait, 0.001), remaining))
     
     def _record_call_time(self, call_time: float):
-        """记录调用时间"""
-        self._call_times.append(call_time)
-        # 只保留最近1分钟的记录
-        cutoff_time = call_time - 60
-        while self._call_times and self._call_times[0] < cutoff_time:
-            self._call_times.popleft()
+        """记录调用时间（覆盖环形缓冲区中最旧的记录）"""
+        self._call_times[self._call_index] = call_time
+        self._call_index = (self._call_index + 1) % len(self._call_times)
     
     def get_stats(self) -> Dict[str, Any]:
         """获取限流统计信息"""
-        now = time.time()
-        with self._lock:
-            # 清理过期记录
+        now = time.monotonic()
+        with self._cond:
+            # 统计最近1分钟的调用
             cutoff_time = now - 60
-            while self._call_times and self._call_times[0] < cutoff_time:
-                self._call_times.popleft()
+            calls_last_minute = sum(1 for call_time in self._call_times if call_time >= cutoff_time)
             
             return {
-                'calls_last_minute': len(self._call_times),
+                'calls_last_minute': calls_last_minute,
                 'minute_bucket_tokens': self.minute_bucket.tokens,
                 'second_bucket_tokens': self.second_bucket.tokens,
-                'last_call_time': self._last_call_time,
+                # 单调时钟换算为时间戳，从未调用时为0
+                'last_call_time': (time.time() - (now - self._last_call_time)
+                                   if self._last_call_time > float('-inf') else 0),
                 'config': self.config
             }
 
@@ -176,23 +227,8 @@ class RetryHandler:
         if attempt >= self.config.max_retries:
             return False
         
-        error_msg = str(error).lower()
-        
         # 检查是否是可重试的错误
-        retryable_errors = [
-            'rate limit',
-            'throttling',
-            'quota',
-            'too many requests',
-            'timeout',
-            '429',
-            'service unavailable',
-            '503',
-            'connection',
-            'network'
-        ]
-        
-        return any(keyword in error_msg for keyword in retryable_errors)
+        return _classify(str(error))[0]
     
     def get_delay(self, attempt: int, error: Exception) -> float:
         """
@@ -205,13 +241,13 @@ class RetryHandler:
         Returns:
             float: 延迟时间(秒)
         """
-        error_msg = str(error).lower()
+        category = _classify(str(error))[1]
         
         # 根据错误类型调整延迟
-        if 'rate limit' in error_msg or 'throttling' in error_msg:
+        if category == "rate":
             # 限流错误使用较长延迟
             base_delay = self.config.base_delay * 2
-        elif 'timeout' in error_msg or 'network' in error_msg:
+        elif category == "net":
             # 网络错误使用中等延迟
             base_delay = self.config.base_delay
         else:
@@ -222,7 +258,6 @@ class RetryHandler:
         delay = base_delay * (self.config.backoff_factor ** (attempt - 1))
         
         # 添加随机抖动，避免雷群效应
-        import random
         jitter = random.uniform(0.8, 1.2)
         delay *= jitter
         
@@ -1,8 +1,10 @@
 import asyncio
+import contextlib
 import logging
 import os
 import tempfile
-from typing import Any
+import threading
+from typing import Any, Coroutine, Iterator, TypeVar
 
 from dotenv import load_dotenv
 
@@ -11,6 +13,8 @@ from ..nodes.copywriting_generation import (
 )
 from ..nodes.input_parsing import input_parsing_node
 from .oss import upload_to_oss
+from .oss_fix import get_oss_config_safe
+from ..core.llm_client import close_llm_clients
 
 # 导入状态类
 from ..nodes.state import VideoGenerationState
@@ -27,6 +31,53 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+
+# 当前线程正在执行的视频生成任务所用的事件循环
+_pipeline = threading.local()
+
+
+async def _closing_llm_clients(coro):
+    """运行协程，结束后关闭本事件循环上创建的大模型客户端，避免连接池随事件循环一起泄漏"""
+    try:
+        return await coro
+    finally:
+        await close_llm_clients()
+
+
+@contextlib.contextmanager
+def pipeline_event_loop() -> Iterator[asyncio.AbstractEventLoop]:
+    """
+    为当前线程中的一次视频生成任务提供共用的事件循环
+    
+    在 with 块内调用的各步骤函数都在同一个事件循环中运行，大模型客户端及其连接池、
+    to_thread 线程池在步骤之间复用；每个任务（线程）各有自己的事件循环，互不阻塞。
+    退出时关闭客户端和事件循环。
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    _pipeline.loop = loop
+    try:
+        yield loop
+    finally:
+        _pipeline.loop = None
+        try:
+            loop.run_until_complete(close_llm_clients())
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.run_until_complete(loop.shutdown_default_executor())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+
+def _run(coro: Coroutine[Any, Any, T]) -> T:
+    """运行协程：在 pipeline_event_loop 内时使用任务共用的事件循环，否则单独新建一个"""
+    loop = getattr(_pipeline, "loop", None)
+    if loop is None:
+        return asyncio.run(_closing_llm_clients(coro))
+    return loop.run_until_complete(coro)
+
 
 def generate_voiceovers(storyboard: list, root_dir: str, dashscope_api_key: str = None) -> list:
     """
@@ -54,7 +105,7 @@ def generate_voiceovers(storyboard: list, root_dir: str, dashscope_api_key: str
     }
     
     # 运行异步函数
-    result = asyncio.run(voiceover_generation_node(state))
+    result = _run(voiceover_generation_node(state))
     
     # 返回音频文件路径
     return result.get("audio_files", [])
@@ -84,7 +135,7 @@ def parse_user_input(input_text: str, dashscope_api_key: str = None) -> dict[str
     }
     
     # 运行异步函数
-    result = asyncio.run(input_parsing_node(state))
+    result = _run(input_parsing_node(state))
     
     # 转换为期望的格式
     return {
@@ -123,7 +174,7 @@ def generate_copywriting(video_topic: str, dashscope_api_key: str = None) -> dic
     }
     
     # 运行异步函数
-    result = asyncio.run(copywriting_generation_node(state))
+    result = _run(copywriting_generation_node(state))
     
     return result
 
@@ -156,7 +207,7 @@ def generate_storyboard(expanded_content: dict[str, Any], dashscope_api_key: str
     }
     
     # 运行异步函数
-    result = asyncio.run(storyboard_generation_node(state))
+    result = _run(storyboard_generation_node(state))
     
     # 获取原始storyboard数据
     storyboard = result.get("storyboard", [])
@@ -205,7 +256,7 @@ def generate_video_scenes(state: dict[str, Any], dashscope_api_key: str = None)
             logger.warning(f"Scene {i} has no prompt: {scene}")
     
     # 运行异步函数
-    result = asyncio.run(video_generation_node(video_state))
+    result = _run(video_generation_node(video_state))
     
     # 返回视频片段路径
     return result.get("video_segments", [])
@@ -234,7 +285,7 @@ def concatenate_videos_with_audio(video_paths: list, audio_paths: list, root_dir
     }
     
     # 运行异步函数
-    result = asyncio.run(video_concatenation_node(state))
+    result = _run(video_concatenation_node(state))
     
     # 返回最终视频路径
     return result.get("final_video", "")
@@ -253,19 +304,8 @@ def upload_to_oss_wrapper(final_video_path: str, state: dict[str, Any]) -> dict[
     if not final_video_path or not os.path.exists(final_video_path):
         raise Exception("视频文件不存在")
     
-    # 获取OSS配置
-    oss_config = {
-        'access_key_id': os.getenv('OSS_ACCESS_KEY_ID'),
-        'access_key_secret': os.getenv('OSS_ACCESS_KEY_SECRET'),
-        'endpoint': os.getenv('OSS_ENDPOINT'),
-        'bucket': os.getenv('OSS_BUCKET'),
-        'prefix': os.getenv('OSS_PREFIX', 'videos')
-    }
-    
-    # 验证OSS配置
-    for key, value in oss_config.items():
-        if not value and key != 'prefix':
-            raise Exception(f"缺少OSS配置: {key}")
+    # 获取OSS配置（按 .env 修改时间缓存，缺失或为占位符时抛出 ValueError）
+    oss_config = get_oss_config_safe()
     
     # 上传文件
     result = upload_to_oss(final_video_path, oss_config)
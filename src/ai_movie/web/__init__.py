@@ -6,7 +6,7 @@ from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 
 # 导入新的配置和异常处理模块
-from ..core.config import config
+from ..core.config import get_config
 from ..core.exceptions import VideoGenerationException
 from ..core.logging_config import setup_logging, get_logger
 
@@ -19,6 +19,8 @@ login_manager = LoginManager()
 
 
 def create_app():
+    config = get_config()
+    
     # 显式配置模板和静态文件目录
     template_dir = os.path.join(os.path.dirname(__file__), 'templates')
     static_dir = os.path.join(os.path.dirname(__file__), 'static')
@@ -37,7 +39,7 @@ def create_app():
         raise
     
     # 使用新的配置管理系统
-    app.config.update(config.get_flask_config())
+    app.config.update(config.flask_config_dict)
     
     # 根据配置选择是否初始化数据库
     if config.database.use_database:
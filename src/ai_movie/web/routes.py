@@ -20,11 +20,12 @@ from ..utils.utils import (
     generate_video_scenes,
     generate_voiceovers,
     parse_user_input,
+    pipeline_event_loop,
     upload_to_oss_wrapper,
 )
 
 # 新增导入
-from ..core.config import config
+from ..core.config import get_config
 from ..core.exceptions import (
     VideoGenerationException, 
     APIException, 
@@ -39,7 +40,7 @@ from ..core.validation import (
     UserRegistrationRequest,
     UserLoginRequest,
     PaginationRequest,
-    validate_request_data
+    validate_request_json
 )
 
 app_logger = get_logger(__name__)
@@ -68,7 +69,7 @@ def register():
     """用户注册"""
     try:
         # 使用Pydantic验证输入数据
-        request_data = validate_request_data(UserRegistrationRequest, request.get_json())
+        request_data = validate_request_json(UserRegistrationRequest, request.get_data())
         
         app_logger.log_request_start('/register', 'POST', 
                                    username=request_data.username, 
@@ -122,7 +123,7 @@ def login():
     """用户登录"""
     try:
         # 使用Pydantic验证输入数据
-        request_data = validate_request_data(UserLoginRequest, request.get_json())
+        request_data = validate_request_json(UserLoginRequest, request.get_data())
         
         app_logger.log_request_start('/login', 'POST', email=request_data.email)
         
@@ -196,19 +197,8 @@ def logout():
 @login_required
 def generate_video():
     try:
-        # 使用Pydantic验证输入数据
-        json_data = request.get_json()
-        if not json_data:
-            raise ValidationException(
-                "请提供有效的JSON数据",
-                error_code="INVALID_JSON_DATA"
-            )
-        
-        # 处理字段名映射 (input -> input_text)
-        if 'input' in json_data and 'input_text' not in json_data:
-            json_data['input_text'] = json_data.pop('input')
-            
-        request_data = validate_request_data(VideoGenerationRequest, json_data)
+        # 使用Pydantic直接从请求体验证输入数据（input_text 兼容旧字段名 input）
+        request_data = validate_request_json(VideoGenerationRequest, request.get_data())
         
         workflow_logger.log_task_start("video_generation", 
                                       user_id=current_user.id,
@@ -254,7 +244,7 @@ def generate_video():
         db.session.commit()
         
         # 设置DashScope API Key
-        api_key = request_data.dashscope_api_key or config.ai.dashscope_api_key
+        api_key = request_data.dashscope_api_key or get_config().ai.dashscope_api_key
         if not api_key:
             workflow_logger.error("API密钥缺失", video_id=video.id)
             
@@ -420,7 +410,8 @@ def generate_video_with_image():
 
 def async_generate_video(state, dashscope_api_key, video_id, app):
     """异步执行视频生成任务"""
-    with app.app_context():
+    # 整个任务的各步骤共用一个事件循环（每个任务线程各自一个）
+    with app.app_context(), pipeline_event_loop():
         try:
             # 更新状态
             video_generation_status[video_id] = {
@@ -0,0 +1,17 @@
+"""配置数据类测试"""
+import pytest
+
+from ai_movie.core.config import DatabaseConfig
+
+
+def test_database_config_is_hashable():
+    env = {"DB_POOL_SIZE": "5"}
+    assert hash(DatabaseConfig.from_env(env)) == hash(DatabaseConfig.from_env(env))
+    assert DatabaseConfig.from_env(env) == DatabaseConfig.from_env(env)
+    assert DatabaseConfig.from_env(env) != DatabaseConfig()
+
+
+def test_database_engine_options_are_read_only():
+    config = DatabaseConfig()
+    with pytest.raises(TypeError):
+        config.engine_options["pool_size"] = 1
@@ -0,0 +1,38 @@
+"""异常序列化测试"""
+from ai_movie.core.exceptions import (
+    APIException,
+    DashScopeAPIException,
+    VideoGenerationException,
+    WorkflowException,
+)
+
+
+def test_to_dict_records_exception_type():
+    data = DashScopeAPIException("调用失败", error_code="Throttling").to_dict()
+    assert data["type"] == "DashScopeAPIException"
+    assert data["error_code"] == "Throttling"
+
+
+def test_from_dict_round_trip_with_custom_error_code():
+    exc = DashScopeAPIException("调用失败", error_code="Throttling", details={"status": 429})
+    restored = VideoGenerationException.from_dict(exc.to_dict())
+    assert type(restored) is DashScopeAPIException
+    assert restored.message == "调用失败"
+    assert restored.error_code == "Throttling"
+    assert restored.details == {"status": 429}
+
+
+def test_from_dict_round_trip_with_default_error_code():
+    restored = VideoGenerationException.from_dict(WorkflowException("步骤失败").to_dict())
+    assert type(restored) is WorkflowException
+    assert restored.error_code == "WorkflowException"
+
+
+def test_from_dict_unknown_type_falls_back_to_called_class():
+    restored = APIException.from_dict({"error": "x", "type": "NoSuchException"})
+    assert type(restored) is APIException
+
+
+def test_from_dict_does_not_return_unrelated_subclass():
+    restored = APIException.from_dict(WorkflowException("x").to_dict())
+    assert type(restored) is APIException
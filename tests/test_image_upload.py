@@ -0,0 +1,107 @@
+"""参考图上传测试：缩放后的图片直接上传OSS并返回签名URL"""
+import time
+import types
+import urllib.parse
+
+import cv2
+import numpy as np
+import pytest
+
+from ai_movie.core.config import OSSConfig
+from ai_movie.nodes import video_generation
+from ai_movie.utils import oss
+
+_OSS = OSSConfig(access_key_id="ak", access_key_secret="sk",
+                 endpoint="oss-cn-hangzhou.aliyuncs.com", bucket="bucket", prefix="videos")
+
+
+@pytest.fixture
+def image_path(tmp_path):
+    path = tmp_path / "character.jpg"
+    cv2.imwrite(str(path), np.full((600, 800, 3), 128, dtype=np.uint8))
+    return str(path)
+
+
+@pytest.fixture
+def fake_put_object(monkeypatch):
+    """替换缓存的 Bucket 的 put_object，签名仍由 oss2 在本地计算"""
+    bucket = oss.get_bucket("ak", "sk", _OSS.endpoint, _OSS.bucket)
+    uploads = []
+
+    def put_object(key, data):
+        uploads.append((key, data))
+        return types.SimpleNamespace(request_id="req-1")
+
+    monkeypatch.setattr(bucket, "put_object", put_object)
+    return uploads
+
+
+def test_upload_bytes_returns_signed_url(fake_put_object):
+    result = oss.upload_bytes_to_oss(b"data", "a.jpg", _OSS.to_dict(), url_expires=600)
+
+    (key, data), = fake_put_object
+    assert data == b"data"
+    assert result["oss_file_path"] == key
+    url = urllib.parse.urlsplit(result["oss_url"])
+    assert url.path == "/" + key
+    query = urllib.parse.parse_qs(url.query)
+    assert query["OSSAccessKeyId"] == ["ak"]
+    assert "Signature" in query
+    assert abs(int(query["Expires"][0]) - (time.time() + 600)) < 60
+
+
+def test_upload_bytes_without_expiry_returns_plain_url(fake_put_object):
+    result = oss.upload_bytes_to_oss(b"data", "a.jpg", _OSS.to_dict())
+
+    assert result["oss_url"] == f"https://bucket.{_OSS.endpoint}/{result['oss_file_path']}"
+
+
+@pytest.fixture
+def oss_uploads(monkeypatch):
+    """启用OSS配置并记录 prepare_image_url 发起的上传"""
+    uploads = []
+
+    def upload_bytes_to_oss(data, file_name, oss_config, url_expires=None):
+        uploads.append((data, file_name, oss_config, url_expires))
+        return {"oss_url": f"https://signed.example/{file_name}?Expires=1"}
+
+    monkeypatch.setattr(video_generation, "get_config", lambda: types.SimpleNamespace(oss=_OSS))
+    monkeypatch.setattr(video_generation, "upload_bytes_to_oss", upload_bytes_to_oss)
+    monkeypatch.setattr(video_generation, "_uploaded_image_urls", {})
+    return uploads
+
+
+def test_prepare_image_url_uploads_once_and_reuses_signed_url(oss_uploads, image_path):
+    first = video_generation.prepare_image_url(image_path)
+    second = video_generation.prepare_image_url(image_path)
+
+    assert first == second
+    assert first.startswith("https://signed.example/")
+    (data, file_name, oss_config, url_expires), = oss_uploads
+    assert data[:2] == b"\xff\xd8"
+    assert file_name.endswith(".jpg")
+    assert oss_config["prefix"] == "videos/images"
+    assert url_expires == video_generation._IMAGE_URL_TTL
+
+
+def test_prepare_image_url_reuploads_when_signed_url_expires_soon(oss_uploads, image_path, monkeypatch):
+    video_generation.prepare_image_url(image_path)
+    now = time.time() + video_generation._IMAGE_URL_TTL - video_generation._IMAGE_URL_MIN_REMAINING + 1
+    monkeypatch.setattr(video_generation.time, "time", lambda: now)
+    video_generation.prepare_image_url(image_path)
+
+    assert len(oss_uploads) == 2
+
+
+def test_prepare_image_url_falls_back_to_data_uri(monkeypatch, oss_uploads, image_path):
+    monkeypatch.setattr(video_generation, "upload_bytes_to_oss",
+                        lambda *args, **kwargs: {"oss_url": None, "error": "denied"})
+
+    assert video_generation.prepare_image_url(image_path).startswith("data:image/jpeg;base64,")
+    assert video_generation._uploaded_image_urls == {}
+
+
+def test_prepare_image_url_without_oss_returns_data_uri(monkeypatch, image_path):
+    monkeypatch.setattr(video_generation, "get_config", lambda: types.SimpleNamespace(oss=OSSConfig()))
+
+    assert video_generation.prepare_image_url(image_path).startswith("data:image/jpeg;base64,")
@@ -0,0 +1,20 @@
+"""延迟导入测试：导入工作流模块时不加载节点及其 SDK 依赖"""
+import subprocess
+import sys
+
+
+def _loaded_modules_after(statement: str, modules: list[str]) -> list[str]:
+    """在干净的子进程中执行导入语句，返回其中已被加载的模块"""
+    code = f"import sys\n{statement}\nprint(','.join(m for m in {modules!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            check=True, env={"PYTHONPATH": ":".join(sys.path)})
+    return [m for m in result.stdout.strip().split(",") if m]
+
+
+def test_importing_workflow_defers_node_and_sdk_imports():
+    heavy = ["dashscope", "openai", "cv2", "ai_movie.nodes.video_generation"]
+    assert _loaded_modules_after("import ai_movie.core.video_workflow", heavy) == []
+
+
+def test_importing_package_defers_config():
+    assert _loaded_modules_after("import ai_movie", ["ai_movie.core.config"]) == []
@@ -0,0 +1,72 @@
+"""API限流器测试：acquire 在条件变量上按所需时间等待"""
+import threading
+import time
+
+from ai_movie.utils.rate_limiter import APIRateLimiter, RateLimitConfig
+
+
+class CountingCondition(threading.Condition):
+    """统计 wait 调用次数的条件变量"""
+
+    def __init__(self):
+        super().__init__()
+        self.waits = 0
+
+    def wait(self, timeout=None):
+        self.waits += 1
+        return super().wait(timeout)
+
+
+def _limiter(**overrides) -> APIRateLimiter:
+    config = dict(max_calls_per_minute=100, max_calls_per_second=100, min_interval=0.2)
+    config.update(overrides)
+    limiter = APIRateLimiter(RateLimitConfig(**config))
+    limiter._cond = CountingCondition()
+    return limiter
+
+
+def test_acquire_waits_min_interval_without_polling():
+    limiter = _limiter()
+    assert limiter.acquire()
+
+    start = time.monotonic()
+    assert limiter.acquire()
+    elapsed = time.monotonic() - start
+
+    assert 0.15 <= elapsed < 1.0
+    # 一次等待即可到期，不是按固定间隔反复轮询
+    assert limiter._cond.waits <= 2
+
+
+def test_acquire_times_out_when_tokens_exhausted():
+    limiter = _limiter(max_calls_per_minute=1, min_interval=0.0)
+    assert limiter.acquire()
+
+    start = time.monotonic()
+    assert not limiter.acquire(timeout=0.3)
+    elapsed = time.monotonic() - start
+
+    assert 0.25 <= elapsed < 1.0
+    assert limiter._cond.waits <= 2
+
+
+def test_concurrent_acquires_are_spaced_by_min_interval():
+    limiter = _limiter(min_interval=0.05)
+    granted = []
+    lock = threading.Lock()
+
+    def worker():
+        if limiter.acquire(timeout=5):
+            with lock:
+                granted.append(time.monotonic())
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(granted) == 5
+    granted.sort()
+    gaps = [b - a for a, b in zip(granted, granted[1:])]
+    assert min(gaps) >= 0.04
@@ -0,0 +1,31 @@
+"""请求数据验证测试"""
+import pytest
+
+from ai_movie.core.exceptions import ValidationException
+from ai_movie.core.validation import VideoGenerationRequest, validate_request_json
+
+
+def test_input_text_field():
+    request = validate_request_json(VideoGenerationRequest, b'{"input_text": "  a sunny day  "}')
+    assert request.input_text == "a sunny day"
+
+
+def test_legacy_input_field():
+    request = validate_request_json(VideoGenerationRequest, b'{"input": "a sunny day"}')
+    assert request.input_text == "a sunny day"
+
+
+@pytest.mark.parametrize("body", [
+    b'{"input": "legacy text", "input_text": "current text"}',
+    b'{"input_text": "current text", "input": "legacy text"}',
+])
+def test_both_input_fields_rejected(body):
+    with pytest.raises(ValidationException) as exc_info:
+        validate_request_json(VideoGenerationRequest, body)
+    assert exc_info.value.error_code == "DUPLICATE_INPUT_TEXT"
+
+
+def test_unknown_field_rejected():
+    with pytest.raises(ValidationException) as exc_info:
+        validate_request_json(VideoGenerationRequest, b'{"input_text": "a sunny day", "foo": 1}')
+    assert exc_info.value.error_code == "VALIDATION_ERROR"
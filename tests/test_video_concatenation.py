@@ -0,0 +1,81 @@
+"""视频合并节点测试：TS片段流复制拼接，失败时按错误类型退回重新编码"""
+import asyncio
+
+import pytest
+
+from ai_movie.nodes import video_concatenation
+
+
+class FakeFFmpeg:
+    """记录ffmpeg调用参数，按调用类型返回预设的退出码"""
+
+    def __init__(self, demuxer_result=(0, b""), filter_result=(0, b"")):
+        self.calls = []
+        self.demuxer_result = demuxer_result
+        self.filter_result = filter_result
+
+    async def __call__(self, *args):
+        self.calls.append(args)
+        if "concat" in args:
+            return self.demuxer_result
+        if "libx264" in args:
+            return self.filter_result
+        return 0, b""
+
+    def calls_with(self, *needles):
+        return [args for args in self.calls if all(n in args for n in needles)]
+
+
+@pytest.fixture
+def segments(tmp_path):
+    videos, audios = [], []
+    for i in range(2):
+        v, a = tmp_path / f"{i}.mp4", tmp_path / f"{i}.wav"
+        v.write_bytes(b"v")
+        a.write_bytes(b"a")
+        videos.append(str(v))
+        audios.append(str(a))
+    return {
+        "root_dir": str(tmp_path),
+        "video_segments": videos,
+        "audio_files": audios,
+        # 第一段音频比视频短，第二段比视频长
+        "media_durations": {videos[0]: 5.0, audios[0]: 3.0, videos[1]: 5.0, audios[1]: 6.0},
+    }
+
+
+def _run_node(monkeypatch, state, fake):
+    monkeypatch.setattr(video_concatenation, "_run_ffmpeg", fake)
+    return asyncio.run(video_concatenation.video_concatenation_node(state))
+
+
+def test_segments_merged_to_ts_and_stream_copied(monkeypatch, segments):
+    fake = FakeFFmpeg()
+    result = _run_node(monkeypatch, segments, fake)
+
+    merges = fake.calls_with("mpegts")
+    assert len(merges) == 2
+    assert all(args[args.index("-t") + 1] == "5.0" for args in merges)
+    assert all(any(arg.endswith(".ts") for arg in args) for args in merges)
+    # 只有短于视频的音频需要补静音
+    assert [any("apad" in arg for arg in args) for args in merges] == [True, False]
+
+    (concat,) = fake.calls_with("concat")
+    assert concat[concat.index("-c") + 1] == "copy"
+    assert not fake.calls_with("libx264")
+    assert result["final_video"].endswith("final_video.mp4")
+
+
+def test_reencodes_when_demuxer_reports_timestamp_mismatch(monkeypatch, segments):
+    fake = FakeFFmpeg(demuxer_result=(1, b"Non-monotonous DTS in output stream"))
+    result = _run_node(monkeypatch, segments, fake)
+
+    assert len(fake.calls_with("libx264")) == 1
+    assert result["final_video"].endswith("final_video.mp4")
+
+
+def test_no_reencode_for_unrelated_demuxer_errors(monkeypatch, segments):
+    fake = FakeFFmpeg(demuxer_result=(1, b"Permission denied"))
+    _run_node(monkeypatch, segments, fake)
+
+    assert not fake.calls_with("libx264")
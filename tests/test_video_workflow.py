@@ -0,0 +1,77 @@
+"""工作流编排测试：配音与视频生成并行执行，合并节点等待两者完成"""
+import asyncio
+
+import pytest
+
+import ai_movie.nodes
+from ai_movie.core.video_workflow import create_video_generation_workflow
+
+
+@pytest.fixture
+def fake_nodes(monkeypatch):
+    """用只记录调用的节点替换真实节点，返回调用记录"""
+    calls = []
+    voiceover_started = asyncio.Event()
+    video_started = asyncio.Event()
+
+    def node(name, update):
+        async def _node(state):
+            calls.append(name)
+            return update
+        return _node
+
+    async def voiceover_generation_node(state):
+        calls.append("voiceover_generation")
+        voiceover_started.set()
+        # 视频生成未同时开始时超时失败，确认两个分支并行执行
+        await asyncio.wait_for(video_started.wait(), timeout=5)
+        return {"audio_files": ["0.wav"], "media_durations": {"0.wav": 2.5}}
+
+    async def video_generation_node(state):
+        calls.append("video_generation")
+        video_started.set()
+        await asyncio.wait_for(voiceover_started.wait(), timeout=5)
+        return {"video_segments": ["0.mp4"], "media_durations": {"0.mp4": 5.0}}
+
+    async def video_concatenation_node(state):
+        calls.append("video_concatenation")
+        calls.append(("concat_inputs", state["audio_files"], state["video_segments"],
+                      dict(state["media_durations"])))
+        return {"final_video": "final.mp4"}
+
+    nodes = {
+        "input_parsing_node": node("input_parsing", {"video_topic": "topic"}),
+        "copywriting_generation_node": node("copywriting_generation", {"title": "t", "copywriting": "c"}),
+        "storyboard_generation_node": node("storyboard_generation", {"storyboard": [{"dialogue": "d", "prompt": "p"}]}),
+        "voiceover_generation_node": voiceover_generation_node,
+        "video_generation_node": video_generation_node,
+        "video_concatenation_node": video_concatenation_node,
+        "quality_check_node": node("quality_check", {"quality_acceptable": True}),
+        "post_processing_node": node("post_processing", {}),
+    }
+    # 直接写入模块字典，避免 setattr 先读取原属性而触发真实节点模块的导入
+    for name, fn in nodes.items():
+        monkeypatch.setitem(vars(ai_movie.nodes), name, fn)
+    return calls
+
+
+def test_voiceover_and_video_generation_fan_out_and_join(fake_nodes):
+    app = create_video_generation_workflow()
+    final_state = asyncio.run(app.ainvoke({"input_text": "hello world", "media_durations": {}}))
+
+    calls = [c for c in fake_nodes if isinstance(c, str)]
+    assert calls[:3] == ["input_parsing", "copywriting_generation", "storyboard_generation"]
+    assert set(calls[3:5]) == {"voiceover_generation", "video_generation"}
+    assert calls[5:] == ["video_concatenation", "quality_check", "post_processing"]
+
+    # 合并节点只执行一次，且能看到两个分支的结果
+    (concat_inputs,) = [c for c in fake_nodes if isinstance(c, tuple)]
+    assert concat_inputs == ("concat_inputs", ["0.wav"], ["0.mp4"], {"0.wav": 2.5, "0.mp4": 5.0})
+    assert final_state["final_video"] == "final.mp4"
+
+
+def test_media_durations_reducer_merges_branch_updates(fake_nodes):
+    app = create_video_generation_workflow()
+    final_state = asyncio.run(app.ainvoke({"input_text": "hello world", "media_durations": {"old.mp4": 1.0}}))
+
+    assert final_state["media_durations"] == {"old.mp4": 1.0, "0.wav": 2.5, "0.mp4": 5.0}